@@ -0,0 +1,214 @@
+"""
+Actions and passives parsed out of feature descriptions, with an inverted index.
+
+Descriptions list their mechanics as bullets:
+
+    - Block Action: X Stamina, choosing an amount of stamina to expend, ...
+    - Belittle Action: 2 Stamina X Grit, choose a creature within range. ...
+    - Sparks: 1 Stamina X Mana, choose a creature within 15 spaces, ...
+    - Your grit restores at the beginning of every round.
+
+A bullet whose lead-in ends in "Action" or that starts with costs is an
+action; anything else is a passive. Each record is tagged with index terms:
+
+    action, passive, name:block, cost:Stamina, cost:Round, scaled (an X cost),
+    restores, restores:Grit, restores:any ("any derived stat"), reduces:Will,
+    temporary:Health, damage
+
+Parsing is cached per description hash, so custom features that repeat a
+description cost nothing, and the parsed compendium is cached on disk per
+compendium version, so opening an unchanged compendium never reads the
+descriptions at all.
+
+Usage:
+    python action_index.py cost:Grit [restores ...] [--compendium PATH]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+
+from character_engine import DERIVED_GRAPH, STATS, open_compendium
+
+CACHE_DIR = ".build_cache"
+# Bump when parsing changes, so cached indexes are rebuilt
+PARSER_VERSION = 1
+
+COST_UNITS = {"stamina": "Stamina", "grit": "Grit", "mana": "Mana", "health": "Health", "round": "Round",
+              "rounds": "Round", "turn": "Turn", "turns": "Turn", "minute": "Minute", "minutes": "Minute",
+              "hour": "Hour", "hours": "Hour", "workday": "Workday", "workdays": "Workday", "day": "Day",
+              "days": "Day"}
+COST_PATTERN = re.compile(r"(\d+|X)\s+(" + "|".join(COST_UNITS) + r")\b", re.IGNORECASE)
+LEAD_IN = re.compile(r"^(?P<name>[^:,.]{1,40}?):\s*(?P<rest>.*)$", re.DOTALL)
+RESTORE_WORDS = re.compile(r"\b(restor(?:e|es|ed|ing)|regain(?:s|ed)?|recover(?:s|ed)?|heal(?:s|ed)?)\b")
+# "lower than" compares rather than reduces
+REDUCE_WORDS = re.compile(r"\b(reduc(?:e|es|ed)|lower(?:s|ed)?(?! than)|drain(?:s|ed)?)\b")
+TEMPORARY = re.compile(r"\btemporary (\w+)")
+CLAUSES = re.compile(r"(?<=[.;])\s+")
+
+_parse_cache = {}
+
+
+def description_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _stat_mentions(clause, names):
+    return [name for name in names if re.search(rf"\b{name.casefold()}\b", clause)]
+
+
+def _tags(text):
+    """Effect terms for one bullet."""
+    lowered = text.casefold()
+    pools = DERIVED_GRAPH.pools()
+    tags = set()
+    for clause in CLAUSES.split(lowered):
+        if RESTORE_WORDS.search(clause):
+            # Base stats aren't restored; in "restore a value equal to your Will" Will is only the amount
+            restored = _stat_mentions(clause, pools)
+            if "derived stat" in clause:
+                restored = ["any"]
+            tags.update(f"restores:{stat}" for stat in restored)
+            if restored:
+                tags.add("restores")
+        if REDUCE_WORDS.search(clause):
+            tags.update(f"reduces:{stat}" for stat in _stat_mentions(clause, list(STATS) + pools))
+        for word in TEMPORARY.findall(clause):
+            stat = word.capitalize()
+            if stat in pools:
+                tags.add(f"temporary:{stat}")
+    if re.search(r"\bdamage\b", lowered):
+        tags.add("damage")
+    return tags
+
+
+def _parse_bullet(text):
+    match = LEAD_IN.match(text)
+    if match:
+        name, rest = match.group("name").strip(), match.group("rest")
+        costs = []
+        position = 0
+        # Costs are the run of "<amount> <unit>" pairs right after the colon
+        for cost in COST_PATTERN.finditer(rest):
+            if rest[position:cost.start()].strip(" ,+&") not in ("", "and"):
+                break
+            amount = cost.group(1)
+            costs.append([amount if amount == "X" else int(amount), COST_UNITS[cost.group(2).casefold()]])
+            position = cost.end()
+        is_action = name.endswith(" Action") or bool(costs)
+        if is_action:
+            name = name[:-len(" Action")] if name.endswith(" Action") else name
+            # The cost line itself ("2 Stamina X Grit") says nothing about effects
+            tags = {"action", f"name:{name.casefold()}"} | _tags(rest[position:])
+            tags.update(f"cost:{unit}" for amount, unit in costs)
+            if any(amount == "X" for amount, unit in costs):
+                tags.add("scaled")
+            return {"kind": "action", "name": name, "costs": costs, "text": rest[position:].strip(" ,"),
+                    "tags": sorted(tags)}
+    return {"kind": "passive", "name": "", "costs": [], "text": text, "tags": sorted({"passive"} | _tags(text))}
+
+
+def parse_description(text):
+    """Returns the action and passive records in a description (cached by content hash)."""
+    key = description_hash(text)
+    records = _parse_cache.get(key)
+    if records is None:
+        bullets = [line.strip()[2:].strip() for line in text.splitlines() if line.strip().startswith("- ")]
+        records = _parse_cache[key] = [_parse_bullet(bullet) for bullet in bullets]
+    return records
+
+
+class ActionIndex:
+    """Parsed records for every feature, with an inverted index from term to records."""
+
+    def __init__(self):
+        self.records = []          # {"feature", "kind", "name", "costs", "text", "tags"}; None once removed
+        self.postings = {}         # term -> set of record positions
+        self.by_feature = {}       # feature name -> [record positions]
+
+    @classmethod
+    def for_compendium(cls, compendium, cache_dir=CACHE_DIR):
+        """Builds (or loads from cache_dir, keyed by compendium version) the index of a compendium."""
+        path = None
+        if cache_dir and getattr(compendium, "version", None):
+            path = os.path.join(cache_dir, f"actions-{compendium.version}-{PARSER_VERSION}.json")
+            if os.path.exists(path):
+                index = cls()
+                with open(path, encoding="utf-8") as f:
+                    for record in json.load(f):
+                        index._add_record(record)
+                return index
+        index = cls()
+        for name, entry in compendium.items():
+            index.add_feature(name, entry["description"])
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([record for record in index.records if record], f, separators=(",", ":"))
+        return index
+
+    def add_feature(self, name, description):
+        """Indexes a feature, replacing what was indexed under that name (e.g. an edited custom feature)."""
+        self.remove_feature(name)
+        for record in parse_description(description):
+            self._add_record(dict(record, feature=name))
+
+    def remove_feature(self, name):
+        for position in self.by_feature.pop(name, ()):
+            for term in self.records[position]["tags"]:
+                self.postings[term].discard(position)
+            self.records[position] = None
+
+    def _add_record(self, record):
+        position = len(self.records)
+        self.records.append(record)
+        self.by_feature.setdefault(record["feature"], []).append(position)
+        for term in record["tags"]:
+            self.postings.setdefault(term, set()).add(position)
+
+    def query(self, *terms):
+        """Records tagged with every term, in feature order; e.g. query("action", "cost:Grit")."""
+        return self._records(self._match(terms))
+
+    def _match(self, terms):
+        if not terms:
+            return set()
+        # Intersect starting from the rarest term
+        postings = sorted((self.postings.get(term, set()) for term in terms), key=len)
+        return set(postings[0]).intersection(*postings[1:])
+
+    def _records(self, positions):
+        return [self.records[position] for position in sorted(positions)]
+
+    def actions_costing(self, unit):
+        return self.query("action", f"cost:{unit}")
+
+    def restoring(self, stat=None):
+        """Records that restore `stat`, or any derived stat at all without one."""
+        if stat is None:
+            return self.query("restores")
+        return self._records(self._match([f"restores:{stat}"]) | self._match(["restores:any"]))
+
+    def terms(self):
+        return sorted(term for term, positions in self.postings.items() if positions)
+
+
+def format_costs(costs):
+    return " ".join(f"{amount} {unit}" for amount, unit in costs)
+
+
+if __name__ == "__main__":
+    from compendium import default_compendium_path
+
+    parser = argparse.ArgumentParser(description="Query actions and passives across a compendium.")
+    parser.add_argument("terms", nargs="*", help="Index terms, all of which must match (no terms: list them)")
+    parser.add_argument("--compendium", default=default_compendium_path())
+    args = parser.parse_args()
+
+    index = ActionIndex.for_compendium(open_compendium(args.compendium))
+    if not args.terms:
+        print("\n".join(index.terms()))
+    for record in index.query(*args.terms):
+        label = f"{record['name']} ({format_costs(record['costs'])})" if record["kind"] == "action" else "passive"
+        print(f"{record['feature']}: {label}: {record['text']}")
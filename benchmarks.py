@@ -0,0 +1,409 @@
+"""
+Benchmarks for the rules engine and the real app, with regression checks.
+
+Engine scenarios run anywhere. GUI scenarios drive a real CharacterCreator
+and need a display; on Linux without one, a virtual X server (Xvfb) is
+started if it is installed, otherwise those scenarios are skipped.
+
+Every run is appended to a history file tagged with the git commit. The run
+is then compared with the most recent run of a different commit, and exits
+with status 1 if any scenario's median got slower by more than its threshold.
+
+Usage:
+    python benchmarks.py [--scenario NAME ...] [--repeat 5] [--threshold 0.2]
+                         [--threshold gui_cold_start=0.5] [--baseline COMMIT]
+                         [--history .bench_history.jsonl] [--no-record] [--no-gui]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from character_engine import DERIVED_GRAPH, STATS, TOTAL_POINTS, Allocation, open_compendium
+from character_io import iter_roster, save_roster
+from compendium import write_compendium
+from feature_search import FeatureSearchIndex
+
+HISTORY_FILE = ".bench_history.jsonl"
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.2
+# Slowdowns smaller than this are timer noise, whatever the percentage
+MIN_REGRESSION_MS = 0.5
+
+# Data sizes the scenarios run at
+FEATURE_COUNT = 200
+LARGE_COMPENDIUM_SIZE = 5000
+MIND_SWING = 60
+ROSTER_SIZE = 2000
+SEARCH_QUERIES = ("", "a", "ar", "arc", "wild", "fire", "ma", "scholar", "mind", "zz", "feat 12", "guard")
+
+XVFB_DISPLAY = ":97"
+
+SCENARIOS = {}
+
+
+def scenario(name, gui=False):
+    """Registers fn(context) -> seconds; the scenario times its own hot path, excluding setup."""
+    def register(fn):
+        SCENARIOS[name] = (fn, gui)
+        return fn
+    return register
+
+
+# --- Test data ---
+
+WORDS = ("arcane", "wild", "fire", "stone", "guard", "scholar", "swift", "iron", "mind", "shadow",
+         "storm", "keen", "hunter", "warden", "veteran", "oath", "ember", "frost", "sage", "blade")
+
+
+def synthetic_features(count):
+    """A {name: data} compendium of `count` features with mixed stat choices and specials."""
+    features = {}
+    for i in range(count):
+        name = f"{WORDS[i % len(WORDS)].title()} {WORDS[(i * 7) % len(WORDS)].title()} Feat {i}"
+        choices = [STATS[i % len(STATS)], STATS[(i + 1) % len(STATS)]] if i % 3 else STATS[i % len(STATS)]
+        data = {"stat_increase": choices, "description": f"Synthetic feature {i}. " * 20}
+        if i % 50 == 0:
+            data["special"] = {"derived_stat": "Mana"}
+        elif i % 50 == 25:
+            data["special"] = {"language": f"Tongue {i}"}
+        features[name] = data
+    return features
+
+
+class Context:
+    """Shared test data for one benchmark run, built lazily into a temp dir."""
+
+    def __init__(self, workdir):
+        self.workdir = workdir
+        self._compendiums = {}
+
+    def compendium_path(self, size):
+        if size not in self._compendiums:
+            path = os.path.join(self.workdir, f"compendium-{size}.cmp")
+            write_compendium(synthetic_features(size), path)
+            self._compendiums[size] = path
+        return self._compendiums[size]
+
+    def compendium(self, size):
+        return open_compendium(self.compendium_path(size))
+
+
+def confirmed_character():
+    allocation = Allocation()
+    for i in range(TOTAL_POINTS):
+        allocation.modify(STATS[i % len(STATS)], 1)
+    return allocation.confirm("Bench")
+
+
+def first_choice(entry):
+    choices = entry["stat_increase"]
+    return choices[0] if isinstance(choices, list) else choices
+
+
+# --- Engine scenarios ---
+
+@scenario("engine_add_remove_features")
+def engine_add_remove_features(context):
+    compendium = context.compendium(LARGE_COMPENDIUM_SIZE)
+    picks = [(name, first_choice(entry)) for name, entry in list(compendium.items())[:FEATURE_COUNT]]
+    character = confirmed_character()
+    start = time.perf_counter()
+    ids = [character.add_feature(name, stat, "", compendium)["Id"] for name, stat in picks]
+    for feature_id in ids:
+        character.remove_feature(feature_id, compendium)
+    return time.perf_counter() - start
+
+
+@scenario("engine_mind_swing")
+def engine_mind_swing(context):
+    character = confirmed_character()
+    stats = character.stats
+    values = DERIVED_GRAPH.evaluate(stats, character.extra_derived)
+    start = time.perf_counter()
+    for delta in [1] * MIND_SWING + [-1] * MIND_SWING:
+        stats["Mind"] += delta
+        DERIVED_GRAPH.recompute(stats, character.extra_derived, values, ("Mind",))
+    return time.perf_counter() - start
+
+
+@scenario("engine_search_large_compendium")
+def engine_search_large_compendium(context):
+    compendium = context.compendium(LARGE_COMPENDIUM_SIZE)
+    start = time.perf_counter()
+    index = FeatureSearchIndex(compendium)
+    for query in SEARCH_QUERIES:
+        index.search(query, limit=25)
+    return time.perf_counter() - start
+
+
+@scenario("engine_roster_round_trip")
+def engine_roster_round_trip(context):
+    compendium = context.compendium(LARGE_COMPENDIUM_SIZE)
+    names = list(compendium)[:40]
+    characters = []
+    for i in range(ROSTER_SIZE):
+        character = confirmed_character()
+        for name in names[i % 10:i % 10 + 4]:
+            character.add_feature(name, first_choice(compendium[name]), "", compendium)
+        characters.append(character)
+    path = os.path.join(context.workdir, "roster.jsonl")
+    start = time.perf_counter()
+    save_roster(path, characters, compendium)
+    loaded = sum(1 for _ in iter_roster(path, compendium))
+    elapsed = time.perf_counter() - start
+    assert loaded == ROSTER_SIZE
+    return elapsed
+
+
+@scenario("engine_store_validate")
+def engine_store_validate(context):
+    from roster_store import RosterStore
+
+    compendium = context.compendium(LARGE_COMPENDIUM_SIZE)
+    names = list(compendium)[:40]
+    store = RosterStore()
+    try:
+        for i in range(ROSTER_SIZE):
+            character = confirmed_character()
+            for name in names[i % 10:i % 10 + 4]:
+                character.add_feature(name, first_choice(compendium[name]), "", compendium)
+            store.append(character, compendium)
+        start = time.perf_counter()
+        invalid = store.invalid_rows()
+        having = store.feature_mask(compendium[names[0]]["id"]).sum()
+        elapsed = time.perf_counter() - start
+    finally:
+        store.close()
+    assert len(invalid) == 0 and having > 0
+    return elapsed
+
+
+# --- GUI scenarios ---
+
+def open_app(context, compendium_size=LARGE_COMPENDIUM_SIZE):
+    """A CharacterCreator past stat allocation, drawn once, using a synthetic compendium."""
+    from stat_block import CharacterCreator
+    app = CharacterCreator(context.compendium_path(compendium_size))
+    for i in range(TOTAL_POINTS):
+        app.modify_stat(STATS[i % len(STATS)], 1)
+    app.confirm_stats()
+    app.refresh.flush()
+    app.update()
+    return app
+
+
+def settle(app):
+    """Runs pending refreshes and lets Tk draw, as the event loop would between clicks."""
+    app.refresh.flush()
+    app.update_idletasks()
+
+
+@scenario("gui_add_remove_features", gui=True)
+def gui_add_remove_features(context):
+    app = open_app(context)
+    try:
+        picks = [(name, first_choice(entry), "") for name, entry in list(app.compendium.items())[:FEATURE_COUNT]]
+        start = time.perf_counter()
+        for pick in picks:
+            app._add_feature_logic(*pick)
+            settle(app)
+        for feature in list(app.character.features):
+            app.feature_tree.selected = feature["Id"]
+            app.remove_feature()
+            settle(app)
+        return time.perf_counter() - start
+    finally:
+        app.destroy()
+
+
+@scenario("gui_language_swing", gui=True)
+def gui_language_swing(context):
+    app = open_app(context)
+    try:
+        start = time.perf_counter()
+        for i in range(MIND_SWING):
+            app._add_feature_logic(f"Bench Mind {i}", "Mind", "")
+            settle(app)
+        for feature in list(app.character.features):
+            app.feature_tree.selected = feature["Id"]
+            app.remove_feature()
+            settle(app)
+        return time.perf_counter() - start
+    finally:
+        app.destroy()
+
+
+@scenario("gui_combobox_fill", gui=True)
+def gui_combobox_fill(context):
+    app = open_app(context)
+    try:
+        start = time.perf_counter()
+        for query in SEARCH_QUERIES:
+            app.feature_combobox.set(query)
+            app.refresh_feature_matches()
+            app.update_idletasks()
+        return time.perf_counter() - start
+    finally:
+        app.destroy()
+
+
+COLD_START_SCRIPT = """
+import sys
+sys.argv = ["stat_block.py"]
+from stat_block import CharacterCreator
+app = CharacterCreator({path!r})
+app.update()
+app.destroy()
+"""
+
+
+@scenario("gui_cold_start", gui=True)
+def gui_cold_start(context):
+    """A fresh interpreter up to the first drawn window, as a player's launch would be."""
+    script = COLD_START_SCRIPT.format(path=context.compendium_path(LARGE_COMPENDIUM_SIZE))
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    return time.perf_counter() - start
+
+
+# --- Display ---
+
+def ensure_display():
+    """Makes sure Tk can open a window, starting Xvfb if needed. Returns (ok, Xvfb process or None)."""
+    import tkinter as tk
+
+    xvfb = None
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        if not shutil.which("Xvfb"):
+            return False, None
+        xvfb = subprocess.Popen(["Xvfb", XVFB_DISPLAY, "-screen", "0", "1600x1000x24", "-nolisten", "tcp"],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.environ["DISPLAY"] = XVFB_DISPLAY
+        time.sleep(0.5)
+    try:
+        tk.Tk().destroy()
+    except tk.TclError:
+        if xvfb:
+            xvfb.terminate()
+        return False, None
+    return True, xvfb
+
+
+# --- History and regressions ---
+
+def git_revision():
+    """(short commit, dirty) for the working tree, or ("unknown", True) outside git."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=here, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=here,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", True
+    return commit, bool(status.strip())
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_baseline(history, commit, baseline=None):
+    """The latest run of `baseline` if given, else the latest run of any other commit."""
+    for record in reversed(history):
+        if (record["commit"] == baseline) if baseline else (record["commit"] != commit):
+            return record
+    return None
+
+
+def regressions(results, baseline, thresholds, default_threshold):
+    """[(scenario, median ms, baseline ms, change)] for every scenario slower than allowed."""
+    slower = []
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        now, then = result["median_ms"], before["median_ms"]
+        change = (now - then) / then if then else 0.0
+        if change > thresholds.get(name, default_threshold) and now - then > MIN_REGRESSION_MS:
+            slower.append((name, now, then, change))
+    return slower
+
+
+def run(names, repeat, gui):
+    """Runs scenarios; returns {name: {"median_ms", "min_ms", "runs"}} and the names skipped."""
+    results, skipped = {}, []
+    xvfb = None
+    if gui and any(SCENARIOS[name][1] for name in names):
+        gui, xvfb = ensure_display()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            context = Context(workdir)
+            for name in names:
+                fn, needs_gui = SCENARIOS[name]
+                if needs_gui and not gui:
+                    skipped.append(name)
+                    continue
+                times = [fn(context) * 1000 for _ in range(repeat)]
+                results[name] = {"median_ms": round(statistics.median(times), 3),
+                                 "min_ms": round(min(times), 3), "runs": repeat}
+                print(f"{name:<34}{results[name]['median_ms']:>12.2f} ms  (min {results[name]['min_ms']:.2f})")
+    finally:
+        if xvfb:
+            xvfb.terminate()
+    return results, skipped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the rules engine and the app.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Run only these")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--threshold", action="append", default=[], metavar="[NAME=]FRACTION",
+                        help="Allowed slowdown, e.g. 0.2 for all scenarios or gui_cold_start=0.5 for one")
+    parser.add_argument("--baseline", metavar="COMMIT", help="Compare with this commit instead of the last other one")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--no-record", action="store_true", help="Don't append this run to the history")
+    parser.add_argument("--no-gui", action="store_true", help="Skip scenarios that need a display")
+    args = parser.parse_args()
+
+    default_threshold, thresholds = DEFAULT_THRESHOLD, {}
+    for threshold in args.threshold:
+        if "=" in threshold:
+            name, value = threshold.split("=")
+            thresholds[name.strip()] = float(value)
+        else:
+            default_threshold = float(threshold)
+
+    results, skipped = run(args.scenario or list(SCENARIOS), args.repeat, gui=not args.no_gui)
+    if skipped:
+        print(f"Skipped (no display, Xvfb not found): {', '.join(skipped)}")
+
+    commit, dirty = git_revision()
+    history = load_history(args.history)
+    baseline = find_baseline(history, commit, args.baseline)
+    if not args.no_record:
+        record = {"commit": commit, "dirty": dirty, "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "python": platform.python_version(), "platform": platform.platform(), "results": results}
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    if baseline is None:
+        print("No baseline run to compare with yet.")
+        sys.exit(0)
+    slower = regressions(results, baseline, thresholds, default_threshold)
+    print(f"Compared with {baseline['commit']} ({baseline['date']}):")
+    for name, now, then, change in slower:
+        print(f"  REGRESSION {name}: {then:.2f} ms -> {now:.2f} ms (+{change:.0%})")
+    if not slower:
+        print("  no regressions")
+    sys.exit(1 if slower else 0)
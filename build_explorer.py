@@ -0,0 +1,201 @@
+"""
+Build-space explorer: every legal allocation crossed with every feature pick.
+
+Derived stats depend only on the final base stats and on which conditional
+derived stats (Mana, homebrew pools) are granted, so feature picks are first
+collapsed into their distinct effects - "+1 Might, +1 Mind, grants Mana" - with
+one representative pick list each. That keeps the space small even with
+hundreds of custom features. Effects are then crossed with all point-buy
+allocations and the derived stats for every build are computed in bulk with
+NumPy through the derived-stat graph. Builds dominated on every column (base
+and derived stats) are pruned, which never changes the answer to a query that
+maximizes one column subject to minimums on others.
+
+Results are cached in memory and on disk, keyed by compendium version, so
+queries against an unchanged compendium never re-enumerate.
+
+Usage:
+    python build_explorer.py --max Grit --min Health=9 --min Mind=4 [--features 2] [--limit 5]
+"""
+import argparse
+import hashlib
+import json
+import os
+from itertools import combinations
+
+import numpy as np
+
+from character_engine import DERIVED_GRAPH, MIN_STAT, STATS, TOTAL_POINTS, open_compendium, stat_choices
+
+CACHE_DIR = ".build_cache"
+DEFAULT_MAX_FEATURES = 2
+
+_memory_cache = {}
+
+
+def allocations(total_points=TOTAL_POINTS):
+    """Every legal point-buy allocation as an (n, len(STATS)) array."""
+    # Stars and bars: choose where the dividers go among points + stats - 1 slots
+    slots = total_points + len(STATS) - 1
+    rows = []
+    for dividers in combinations(range(slots), len(STATS) - 1):
+        bounds = (-1,) + dividers + (slots,)
+        rows.append([bounds[i + 1] - bounds[i] - 1 + MIN_STAT for i in range(len(STATS))])
+    return np.array(rows, dtype=np.int16)
+
+
+def feature_effects(compendium, max_features):
+    """Collapses every pick of up to max_features features into its distinct effects.
+
+    Returns a list of (stat increases tuple, granted derived stats, representative
+    [(feature, stat), ...]) with one entry per distinct (increases, granted) pair.
+    """
+    states = {((0,) * len(STATS), frozenset()): ()}
+    for name, entry in compendium.items():
+        special = entry.get("special") or {}
+        granted = special.get("derived_stat")
+        new_states = dict(states)
+        for (increases, derived), picks in states.items():
+            if len(picks) >= max_features:
+                continue
+            new_derived = derived | {granted} if granted in DERIVED_GRAPH.nodes else derived
+            for stat in stat_choices(entry):
+                if stat not in STATS:
+                    continue
+                index = STATS.index(stat)
+                new_increases = increases[:index] + (increases[index] + 1,) + increases[index + 1:]
+                key = (new_increases, new_derived)
+                if key not in new_states:
+                    new_states[key] = picks + ((name, stat),)
+        states = new_states
+    return [(increases, derived, picks) for (increases, derived), picks in states.items()]
+
+
+def pareto_mask(values):
+    """True for rows not dominated by another row (>= everywhere, > somewhere).
+
+    Rows are visited in descending order of their sum, so a row can only be
+    dominated by one already kept; duplicates keep their first occurrence.
+    """
+    order = np.argsort(-values.sum(axis=1, dtype=np.int64), kind="stable")
+    keep = np.zeros(len(values), dtype=bool)
+    kept = np.empty_like(values)
+    kept_count = 0
+    for index in order:
+        row = values[index]
+        if kept_count and np.all(kept[:kept_count] >= row, axis=1).any():
+            continue
+        keep[index] = True
+        kept[kept_count] = row
+        kept_count += 1
+    return keep
+
+
+class BuildSpace:
+    """All non-dominated builds for one compendium, queryable by column."""
+
+    def __init__(self, columns, values, allocation_rows, effect_index, effects):
+        self.columns = columns
+        self.values = values                  # (builds, columns)
+        self.allocation_rows = allocation_rows  # (builds, len(STATS)) point-buy allocation
+        self.effect_index = effect_index        # (builds,) index into effects
+        self.effects = effects                  # [[(feature, stat), ...], ...]
+
+    def query(self, maximize, at_least=None, limit=5):
+        """Best builds for `maximize` among those meeting every {column: minimum}.
+
+        Returns a list of dicts with the allocation, feature picks and all column values.
+        """
+        mask = np.ones(len(self.values), dtype=bool)
+        for column, minimum in (at_least or {}).items():
+            mask &= self.values[:, self.columns.index(column)] >= minimum
+        candidates = np.flatnonzero(mask)
+        target = self.values[candidates, self.columns.index(maximize)]
+        best = candidates[np.argsort(-target, kind="stable")[:limit]]
+        return [self.build(i) for i in best]
+
+    def build(self, index):
+        return {
+            "allocation": dict(zip(STATS, self.allocation_rows[index].tolist())),
+            "features": [list(pick) for pick in self.effects[self.effect_index[index]]],
+            "values": dict(zip(self.columns, self.values[index].tolist())),
+        }
+
+
+def explore(compendium, max_features=DEFAULT_MAX_FEATURES, version=None, cache_dir=CACHE_DIR):
+    """Returns the BuildSpace for a compendium, from cache when possible.
+
+    `version` defaults to the compendium's own version; pass one explicitly for
+    plain dict compendiums. The cache key also covers the derived-stat graph, so
+    registering a homebrew formula invalidates it.
+    """
+    version = version or compendium.version
+    key_source = json.dumps([version, max_features, TOTAL_POINTS, list(DERIVED_GRAPH.nodes)])
+    key = hashlib.sha1(key_source.encode("utf-8")).hexdigest()[:16]
+    if key in _memory_cache:
+        return _memory_cache[key]
+
+    path = os.path.join(cache_dir, f"builds-{key}.npz") if cache_dir else None
+    if path and os.path.exists(path):
+        data = np.load(path)
+        space = BuildSpace(json.loads(str(data["columns"])), data["values"], data["allocations"],
+                           data["effect_index"], json.loads(str(data["effects"])))
+    else:
+        space = _enumerate(compendium, max_features)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.savez_compressed(path, columns=json.dumps(space.columns), values=space.values,
+                                allocations=space.allocation_rows, effect_index=space.effect_index,
+                                effects=json.dumps(space.effects))
+    _memory_cache[key] = space
+    return space
+
+
+def _enumerate(compendium, max_features):
+    base = allocations()
+    effects = feature_effects(compendium, max_features)
+    increases = np.array([effect[0] for effect in effects], dtype=np.int16)
+    derived_names = list(DERIVED_GRAPH.nodes)
+    columns = list(STATS) + derived_names
+
+    # Every allocation crossed with every effect: (allocations * effects, stats)
+    final = (base[:, None, :] + increases[None, :, :]).reshape(-1, len(STATS))
+    effect_index = np.tile(np.arange(len(effects)), len(base))
+    allocation_rows = np.repeat(base, len(effects), axis=0)
+
+    values = np.zeros((len(final), len(columns)), dtype=np.int16)
+    values[:, :len(STATS)] = final
+    stat_columns = {stat: final[:, i].astype(np.int32) for i, stat in enumerate(STATS)}
+    # The graph's formulas are plain arithmetic, so they evaluate whole columns at once
+    for granted in {effect[1] for effect in effects}:
+        rows = np.isin(effect_index, [i for i, effect in enumerate(effects) if effect[1] == granted])
+        derived = DERIVED_GRAPH.evaluate({stat: column[rows] for stat, column in stat_columns.items()}, granted)
+        for name, column in derived.items():
+            values[rows, columns.index(name)] = column
+
+    keep = pareto_mask(values)
+    return BuildSpace(columns, values[keep], allocation_rows[keep], effect_index[keep],
+                      [[list(pick) for pick in effect[2]] for effect in effects])
+
+
+if __name__ == "__main__":
+    from compendium import default_compendium_path
+
+    parser = argparse.ArgumentParser(description="Query the space of legal character builds.")
+    parser.add_argument("--max", required=True, help="Column to maximize, e.g. Grit")
+    parser.add_argument("--min", action="append", default=[], metavar="COLUMN=VALUE", help="Minimum for a column")
+    parser.add_argument("--features", type=int, default=DEFAULT_MAX_FEATURES, help="Most features per build")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--compendium", default=default_compendium_path())
+    args = parser.parse_args()
+
+    at_least = {}
+    for condition in args.min:
+        column, value = condition.split("=")
+        at_least[column.strip()] = int(value)
+    space = explore(open_compendium(args.compendium), args.features)
+    print(f"{len(space.values)} non-dominated builds")
+    for build in space.query(args.max, at_least, args.limit):
+        features = ", ".join(f"{name} (+1 {stat})" for name, stat in build["features"]) or "no features"
+        print(f"{build['values'][args.max]} {args.max}: {build['allocation']} with {features}")
+        print(f"    {build['values']}")
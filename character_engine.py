@@ -0,0 +1,308 @@
+"""
+Headless rules engine for Flutter characters.
+
+Everything in here is plain Python with no Tk dependency, so characters can be
+built and validated from data (NPC rosters, generators, checkers) without
+creating a window. The GUI in stat_block.py is a view over these objects.
+"""
+from compendium import Compendium
+from derived_graph import default_graph, language_slots, register_compendium_formulas
+
+# --- Core Rules ---
+STATS = ("Might", "Agility", "Mind", "Will")
+TOTAL_POINTS = 8
+MIN_STAT = 1
+NO_STAT = "None"
+
+# Formulas for every derived stat; homebrew ones are registered here too
+DERIVED_GRAPH = default_graph(STATS)
+
+
+def open_compendium(path):
+    """Opens a compendium and registers its homebrew derived stats in DERIVED_GRAPH.
+
+    Every tool opens compendiums through here, so a homebrew pool shows up in
+    saves, exports, explorer and store columns alike, not just in the GUI.
+    """
+    compendium = Compendium(path)
+    try:
+        compendium.derived_stats = register_compendium_formulas(DERIVED_GRAPH, compendium)
+    except ValueError:
+        compendium.close()
+        raise
+    return compendium
+
+
+def close_compendium(compendium):
+    """Closes a compendium opened by open_compendium and withdraws the derived stats it registered."""
+    for name in reversed(getattr(compendium, "derived_stats", ())):
+        DERIVED_GRAPH.unregister(name)
+    compendium.derived_stats = []
+    compendium.close()
+
+
+class RuleError(ValueError):
+    """Raised when an action or a character breaks the creation rules."""
+
+
+class DuplicateFeatureError(RuleError):
+    """Raised when a feature with the same (case-insensitive) name is added twice."""
+
+
+def derived_stats(stats, extra_derived=()):
+    """Returns the maximum value of every active derived pool for the given base stats."""
+    nodes = DERIVED_GRAPH.nodes
+    return {name: value for name, value in DERIVED_GRAPH.evaluate(stats, extra_derived).items() if nodes[name].pool}
+
+
+def stat_choices(feature_data):
+    """Normalises a compendium 'stat_increase' entry (a stat or a list of stats) to a tuple."""
+    stat_increase = feature_data["stat_increase"]
+    if isinstance(stat_increase, str):
+        return (stat_increase,)
+    return tuple(stat_increase)
+
+
+class Allocation:
+    """The point-buy step: spend TOTAL_POINTS across the base stats, each at least MIN_STAT."""
+    __slots__ = ("stats", "points_left")
+
+    def __init__(self, total_points=TOTAL_POINTS):
+        self.stats = {stat: MIN_STAT for stat in STATS}
+        self.points_left = total_points
+
+    def modify(self, stat, delta):
+        """Moves one point into (delta=1) or out of (delta=-1) a stat. Returns True if anything changed."""
+        if delta == 1 and self.points_left > 0:
+            self.stats[stat] += 1
+            self.points_left -= 1
+            return True
+        if delta == -1 and self.stats[stat] > MIN_STAT:
+            self.stats[stat] -= 1
+            self.points_left += 1
+            return True
+        return False
+
+    def confirm(self, name=""):
+        """Returns a Character built from this allocation, or raises RuleError if points are left."""
+        if self.points_left > 0:
+            raise RuleError("Please allocate all stat points before proceeding.")
+        return Character(self.stats, name=name)
+
+
+class FeatureStore:
+    """A character's features, indexed by stable id and by case-folded name.
+
+    Adding, looking up and removing a feature are all constant time, and each
+    feature keeps the id it was given for its whole life (the GUI uses it as the
+    Treeview item id). Iteration yields features in the order they were added.
+    """
+    __slots__ = ("_by_id", "_by_name", "_next_id")
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_name = {}
+        self._next_id = 1
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __contains__(self, name):
+        return name.casefold() in self._by_name
+
+    def add(self, name, stat, desc):
+        """Stores a new feature and returns it. Raises DuplicateFeatureError on a name clash."""
+        folded = name.casefold()
+        if folded in self._by_name:
+            raise DuplicateFeatureError(f"The feature '{name}' has already been added.")
+        feature = {"Id": self._next_id, "Name": name, "Stat": stat, "Description": desc}
+        self._next_id += 1
+        self._by_id[feature["Id"]] = feature
+        self._by_name[folded] = feature
+        return feature
+
+    def get(self, feature_id):
+        return self._by_id.get(feature_id)
+
+    def find(self, name):
+        """Looks a feature up by name, ignoring case."""
+        return self._by_name.get(name.casefold())
+
+    def remove(self, feature_id):
+        """Removes and returns the feature with this id, or None if there is none."""
+        feature = self._by_id.pop(feature_id, None)
+        if feature is not None:
+            del self._by_name[feature["Name"].casefold()]
+        return feature
+
+
+class Character:
+    """A character's rules state: base stats, features and the effects of their special rules.
+
+    `extra_derived` and `granted_languages` count how many features grant each
+    derived stat or language, so removing one feature never needs a rescan.
+    `languages` is the sheet's language list (including overrides) and `pools`
+    holds the current value of each derived pool; a missing pool is full.
+    """
+    __slots__ = ("name", "stats", "features", "extra_derived", "granted_languages", "languages", "pools")
+
+    def __init__(self, stats=None, name=""):
+        self.name = name
+        self.stats = dict(stats) if stats else {stat: MIN_STAT for stat in STATS}
+        self.features = FeatureStore()
+        self.extra_derived = {}
+        self.granted_languages = {}
+        self.languages = []
+        self.pools = {}
+
+    @property
+    def derived(self):
+        return derived_stats(self.stats, self.extra_derived)
+
+    @property
+    def language_slots(self):
+        return language_slots(self.stats["Mind"])
+
+    def allocated_stats(self):
+        """The point-buy allocation, i.e. the base stats without feature increases."""
+        stats = dict(self.stats)
+        for feature in self.features:
+            if feature["Stat"] in stats:
+                stats[feature["Stat"]] -= 1
+        return stats
+
+    def current_pools(self):
+        """Current value of every derived pool, clamped to its maximum."""
+        return {pool: min(self.pools.get(pool, maximum), maximum) for pool, maximum in self.derived.items()}
+
+    def has_feature(self, name):
+        return name in self.features
+
+    def get_feature(self, feature_id):
+        return self.features.get(feature_id)
+
+    def find_feature(self, name):
+        return self.features.find(name)
+
+    def add_feature(self, name, stat, desc, compendium=None):
+        """Adds a feature and applies its stat increase and special rules.
+
+        Predefined features (those found in the compendium) must use one of their
+        listed stat choices; custom features may raise any base stat or "None".
+        Returns the stored feature dict, raises RuleError if the feature is not allowed.
+        """
+        # Rows from files and batches are plain data, so a number here must not reach casefold()
+        for field, value in (("name", name), ("stat", stat), ("description", desc)):
+            if not isinstance(value, str):
+                raise RuleError(f"Feature {field} must be text, not {type(value).__name__}.")
+        if name in self.features:
+            raise DuplicateFeatureError(f"The feature '{name}' has already been added.")
+
+        feature_data = compendium.get(name) if compendium is not None else None
+        if feature_data is not None:
+            if stat not in stat_choices(feature_data):
+                raise RuleError(f"'{name}' cannot increase {stat}.")
+        elif stat != NO_STAT and stat not in self.stats:
+            raise RuleError(f"Unknown stat '{stat}'.")
+
+        feature = self.features.add(name, stat, desc)
+        if stat in self.stats:
+            self.stats[stat] += 1
+
+        # Handle special rules for predefined features
+        if feature_data is not None:
+            self._apply_special(feature_data.get("special"), 1)
+        return feature
+
+    def remove_feature(self, feature_id, compendium=None):
+        """Removes a feature by id and reverts its effects. Returns the removed feature, or None."""
+        feature = self.features.remove(feature_id)
+        if feature is None:
+            return None
+        if feature["Stat"] in self.stats:
+            self.stats[feature["Stat"]] -= 1
+        feature_data = compendium.get(feature["Name"]) if compendium is not None else None
+        if feature_data is not None:
+            self._apply_special(feature_data.get("special"), -1)
+        return feature
+
+    def _apply_special(self, special, delta):
+        """Adds (delta=1) or withdraws (delta=-1) one feature's grant of its special rules."""
+        if not special:
+            return
+        for key, granted in (("derived_stat", self.extra_derived), ("language", self.granted_languages)):
+            value = special.get(key)
+            if not value:
+                continue
+            count = granted.get(value, 0) + delta
+            if count > 0:
+                granted[value] = count
+            else:
+                granted.pop(value, None)
+
+
+# --- Batch API ---
+def validate_stats(stats, total_points=TOTAL_POINTS):
+    """Checks a point-buy allocation. Raises RuleError if it is not legal."""
+    if set(stats) != set(STATS):
+        raise RuleError(f"Stats must be exactly {', '.join(STATS)}.")
+    for stat in STATS:
+        value = stats[stat]
+        # bool is an int subclass, but True is not a stat value
+        if not isinstance(value, int) or isinstance(value, bool) or value < MIN_STAT:
+            raise RuleError(f"{stat} must be a whole number of at least {MIN_STAT}.")
+    spent = sum(stats.values()) - MIN_STAT * len(STATS)
+    if spent != total_points:
+        raise RuleError(f"Allocation spends {spent} points, expected {total_points}.")
+
+
+def build_character(data, compendium=None):
+    """Builds and validates a character from plain data.
+
+    `data` is a dict with an allocation under "stats" and an optional "name"
+    and "features" list. Each feature is either a predefined feature name (which
+    must have a single stat choice), or a dict with "name", "stat" and, for
+    custom features, "description".
+    """
+    stats = data["stats"]
+    validate_stats(stats)
+    character = Character(stats, name=data.get("name", ""))
+    for feature in data.get("features", ()):
+        if isinstance(feature, str):
+            feature = {"name": feature}
+        name = feature["name"]
+        feature_data = compendium.get(name) if compendium is not None else None
+        stat = feature.get("stat")
+        if stat is None:
+            if feature_data is None:
+                raise RuleError(f"Custom feature '{name}' needs a stat (or \"None\").")
+            choices = stat_choices(feature_data)
+            if len(choices) != 1:
+                raise RuleError(f"'{name}' needs a stat choice from {', '.join(choices)}.")
+            stat = choices[0]
+        desc = feature.get("description")
+        if desc is None:
+            desc = feature_data["description"] if feature_data is not None else ""
+        character.add_feature(name, stat, desc, compendium)
+    return character
+
+
+def build_characters(rows, compendium=None):
+    """Builds many characters from data in one pass.
+
+    Returns (characters, errors), where errors is a list of (row index, message)
+    for every row that failed validation. Invalid rows never stop the batch.
+    """
+    characters = []
+    errors = []
+    for index, data in enumerate(rows):
+        try:
+            characters.append(build_character(data, compendium))
+        except KeyError as e:
+            errors.append((index, f"Missing field {e}"))
+        except (RuleError, TypeError) as e:
+            errors.append((index, str(e)))
+    return characters, errors
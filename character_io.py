@@ -0,0 +1,143 @@
+"""
+Saving and loading characters.
+
+Characters are stored as compact JSON records, one per line, so a single
+character file and a roster of thousands share the same format and a roster
+can be read one line at a time. A record looks like:
+
+    {"v":1,"n":"Ash","s":[3,2,3,4],"f":[["veteran","Might"],{"n":"Lucky","s":"None","d":"..."}],
+     "l":["Common","Primordial"],"p":{"Health":7}}
+
+"s" is the point-buy allocation (Might, Agility, Mind, Will) before feature
+increases. Predefined features are [compendium id, chosen stat]; custom ones
+are stored inline. Only pools that are not full are written under "p".
+
+Usage:
+    python character_io.py check roster.jsonl [compendium.cmp]
+"""
+import json
+import sys
+
+from character_engine import STATS, Character, RuleError, open_compendium, validate_stats
+
+FORMAT_VERSION = 1
+
+
+def character_to_record(character, compendium):
+    """Converts a Character to its compact save record (a plain dict)."""
+    allocation = character.allocated_stats()
+    features = []
+    for feature in character.features:
+        entry = compendium.get(feature["Name"])
+        if entry is not None:
+            features.append([entry["id"], feature["Stat"]])
+        else:
+            features.append({"n": feature["Name"], "s": feature["Stat"], "d": feature["Description"]})
+    record = {"v": FORMAT_VERSION, "n": character.name, "s": [allocation[stat] for stat in STATS], "f": features}
+    if character.languages:
+        record["l"] = list(character.languages)
+    derived = character.derived
+    pools = {pool: value for pool, value in character.current_pools().items() if value != derived[pool]}
+    if pools:
+        record["p"] = pools
+    return record
+
+
+def character_from_record(record, compendium):
+    """Rebuilds a Character from a save record, re-validating it against the rules."""
+    if not isinstance(record, dict):
+        raise RuleError("A character record must be a JSON object.")
+    if record.get("v") != FORMAT_VERSION:
+        raise RuleError(f"Unsupported save format {record.get('v')!r}.")
+    stats = dict(zip(STATS, record["s"]))
+    validate_stats(stats)
+    name = record.get("n", "")
+    if not isinstance(name, str):
+        raise RuleError("The character name must be text.")
+    character = Character(stats, name=name)
+    for feature in record.get("f", ()):
+        if isinstance(feature, list):
+            feature_id, stat = feature
+            entry = compendium.by_id(feature_id)
+            if entry is None:
+                raise RuleError(f"Feature '{feature_id}' is not in this compendium.")
+            character.add_feature(entry["name"], stat, entry["description"], compendium)
+        else:
+            character.add_feature(feature["n"], feature["s"], feature.get("d", ""), compendium)
+    languages = record.get("l", [])
+    if not isinstance(languages, list) or not all(isinstance(language, str) for language in languages):
+        raise RuleError("Languages must be a list of text.")
+    character.languages = list(languages)
+    character.pools = validate_pools(record.get("p", {}), character.derived)
+    return character
+
+
+def validate_pools(pools, derived):
+    """Checks saved current pool values against a character's maxima. Returns them as a new dict."""
+    if not isinstance(pools, dict):
+        raise RuleError("Pools must be a mapping of pool name to value.")
+    for pool, value in pools.items():
+        if pool not in derived:
+            raise RuleError(f"Unknown pool '{pool}'.")
+        if not isinstance(value, int) or isinstance(value, bool) or not 0 <= value <= derived[pool]:
+            raise RuleError(f"{pool} must be a whole number from 0 to {derived[pool]}.")
+    return dict(pools)
+
+
+def dumps(character, compendium):
+    return json.dumps(character_to_record(character, compendium), separators=(",", ":"), ensure_ascii=False)
+
+
+def save_character(path, character, compendium):
+    save_roster(path, [character], compendium)
+
+
+def load_character(path, compendium):
+    """Loads the first character in a save file."""
+    for character in iter_roster(path, compendium):
+        return character
+    raise RuleError(f"'{path}' does not contain a character.")
+
+
+def save_roster(path, characters, compendium):
+    """Writes characters one record per line; `characters` may be any iterable."""
+    with open(path, "w", encoding="utf-8") as f:
+        for character in characters:
+            f.write(dumps(character, compendium))
+            f.write("\n")
+
+
+def iter_roster(path, compendium, errors=None):
+    """Yields characters from a roster file one line at a time.
+
+    Without `errors`, the first invalid record raises RuleError. With an
+    `errors` list, invalid records are skipped and (line number, message)
+    is appended for each, so one bad NPC doesn't stop a large import.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield character_from_record(json.loads(line), compendium)
+            except (ValueError, KeyError, TypeError) as e:
+                # RuleError and json.JSONDecodeError are both ValueErrors
+                message = f"Missing field {e}" if isinstance(e, KeyError) else str(e)
+                if errors is None:
+                    raise RuleError(f"Line {line_number}: {message}") from e
+                errors.append((line_number, message))
+
+
+if __name__ == "__main__":
+    from compendium import default_compendium_path
+
+    if len(sys.argv) not in (3, 4) or sys.argv[1] != "check":
+        print(__doc__)
+        sys.exit(1)
+    compendium = open_compendium(sys.argv[3] if len(sys.argv) == 4 else default_compendium_path())
+    errors = []
+    count = sum(1 for _ in iter_roster(sys.argv[2], compendium, errors))
+    print(f"{count} valid characters, {len(errors)} invalid")
+    for line_number, message in errors:
+        print(f"  line {line_number}: {message}")
+    sys.exit(1 if errors else 0)
@@ -0,0 +1,156 @@
+"""
+On-disk feature compendium with lazily loaded descriptions.
+
+A compendium file (*.cmp) is a single line of JSON - the index - followed by the
+UTF-8 encoded descriptions, back to back. The index holds everything needed to
+build and validate characters (name, id, stat_increase, special) plus the byte
+span of each description. Loading a compendium only reads that first line;
+descriptions are sliced out of a memory-mapped view of the file when they are
+first asked for, so startup time and memory stay flat as the compendium grows.
+
+Usage:
+    python compendium.py build features.json features.cmp
+    python compendium.py export features.cmp features.json
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+from collections.abc import Mapping
+
+FORMAT_VERSION = 1
+DEFAULT_COMPENDIUM = "features.cmp"
+
+
+def default_compendium_path():
+    """Path of the bundled compendium, also when running from a PyInstaller build."""
+    base_dir = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, DEFAULT_COMPENDIUM)
+
+
+def feature_id(name):
+    """Stable id for a feature name, e.g. "Wild Mage" -> "wild-mage"."""
+    return re.sub(r"[^a-z0-9]+", "-", name.casefold()).strip("-")
+
+
+class CompendiumEntry(dict):
+    """One feature's index record. Its "description" is fetched from the compendium on access."""
+    __slots__ = ("_compendium",)
+
+    def __missing__(self, key):
+        if key == "description":
+            return self._compendium.description(self["name"])
+        raise KeyError(key)
+
+
+class Compendium(Mapping):
+    """Read-only mapping of feature name -> CompendiumEntry backed by a .cmp file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._view = None
+        with open(path, "rb") as f:
+            header = f.readline()
+            self._blob_start = f.tell()
+        index = json.loads(header)
+        if index.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compendium format in '{path}'.")
+        self.version = index["version"]
+        self._entries = {}
+        self._spans = {}
+        self._by_id = {}
+        for record in index["features"]:
+            entry = CompendiumEntry(
+                (key, record[key]) for key in ("name", "id", "stat_increase", "special") if key in record
+            )
+            entry._compendium = self
+            self._entries[record["name"]] = entry
+            self._spans[record["name"]] = (record["offset"], record["length"])
+            self._by_id[record["id"]] = entry
+
+    def __getitem__(self, name):
+        return self._entries[name]
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def by_id(self, feature_id):
+        """Looks a feature up by its stable id. Returns None if it is not in this compendium."""
+        return self._by_id.get(feature_id)
+
+    def description(self, name):
+        """Reads one feature's description from the memory-mapped file."""
+        offset, length = self._spans[name]
+        if length == 0:
+            return ""
+        if self._view is None:
+            self._file = open(self.path, "rb")
+            self._view = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        start = self._blob_start + offset
+        return self._view[start:start + length].decode("utf-8")
+
+    def close(self):
+        if self._view is not None:
+            self._view.close()
+            self._file.close()
+            self._view = self._file = None
+
+
+def write_compendium(features, path):
+    """Writes a compendium file from a {name: {"stat_increase", "description", "special"?}} dict."""
+    records = []
+    blobs = []
+    offset = 0
+    digest = hashlib.sha1()
+    for name, data in features.items():
+        blob = data.get("description", "").encode("utf-8")
+        record = {"name": name, "id": data.get("id") or feature_id(name), "stat_increase": data["stat_increase"]}
+        if data.get("special"):
+            record["special"] = data["special"]
+        digest.update(json.dumps(record, sort_keys=True).encode("utf-8"))
+        digest.update(blob)
+        record["offset"] = offset
+        record["length"] = len(blob)
+        records.append(record)
+        blobs.append(blob)
+        offset += len(blob)
+
+    index = {"format": FORMAT_VERSION, "version": digest.hexdigest()[:16], "features": records}
+    with open(path, "wb") as f:
+        f.write(json.dumps(index, separators=(",", ":")).encode("ascii"))
+        f.write(b"\n")
+        for blob in blobs:
+            f.write(blob)
+
+
+def export_compendium(compendium):
+    """Returns a compendium as a plain, fully loaded dict in the same shape write_compendium takes."""
+    features = {}
+    for name, entry in compendium.items():
+        data = {"id": entry["id"], "stat_increase": entry["stat_increase"], "description": entry["description"]}
+        if "special" in entry:
+            data["special"] = entry["special"]
+        features[name] = data
+    return features
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] not in ("build", "export"):
+        print(__doc__)
+        sys.exit(1)
+    command, source, destination = sys.argv[1:]
+    if command == "build":
+        with open(source, encoding="utf-8") as f:
+            write_compendium(json.load(f), destination)
+    else:
+        compendium = Compendium(source)
+        with open(destination, "w", encoding="utf-8") as f:
+            json.dump(export_compendium(compendium), f, indent=2, ensure_ascii=False)
+        compendium.close()
+    print(f"Wrote '{destination}'")
@@ -1,5 +1,134 @@
+"""
+Icon and art asset pipeline.
+
+Turns source art into a multi-size .ico plus PNG variants (the PNGs are what
+Tk's iconphoto takes on Linux and macOS). Sources are hashed into a manifest
+next to the outputs, so running it again only rebuilds what changed.
+
+Each image is decoded once at reduced size (JPEG `draft`, then an integer
+`reduce` straight to the largest output) and every smaller size is derived
+from the previous one instead of from the full-resolution source. Whole
+directories are processed in parallel, one source per worker process.
+
+Usage:
+    python convert_to_ico.py                          # icon.ico and icons/ for the app
+    python convert_to_ico.py SOURCE_DIR OUTPUT_DIR    # batch: token and portrait art
+        [--sizes 64 128 256] [--no-ico] [--jobs N] [--force]
+"""
 from PIL import Image
+import argparse
+import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+
+APP_ICON_SOURCE = 'crossed_swords_shield.png'
+APP_ICON_OUTPUT = 'icon.ico'
+APP_ICON_PNG_DIR = 'icons'
+
+# Common icon sizes for good compatibility across Windows
+ICO_SIZES = [16, 24, 32, 48, 64, 128, 256]
+# Sizes handed to iconphoto; the window manager picks the closest
+PNG_SIZES = [16, 32, 48, 64, 128, 256]
+ICO_MAX_SIZE = 256
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif', '.tif', '.tiff')
+MANIFEST_NAME = '.asset_manifest.json'
+# Bump when the way outputs are produced changes, so every asset is rebuilt once
+PIPELINE_VERSION = 1
+
+
+def png_variant_path(directory, stem, size):
+    return os.path.join(directory, f"{stem}_{size}.png")
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --- Decoding and downscaling ---
+
+def fit(image_size, box):
+    """The largest size with the image's aspect ratio that fits in a box x box square."""
+    width, height = image_size
+    scale = box / max(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def shrink(img, size):
+    """Shrinks img to size, with the cheap box-filter reduce() when the ratio is a whole number."""
+    width, height = img.size
+    if width % size[0] == 0 and height % size[1] == 0 and width // size[0] == height // size[1]:
+        factor = width // size[0]
+        return img.reduce(factor) if factor > 1 else img
+    return img.resize(size, Image.LANCZOS, reducing_gap=2.0)
+
+
+def load_source(path, largest):
+    """Opens an image already cut down to about `largest` pixels on its long side.
+
+    JPEGs are decoded at 1/2, 1/4 or 1/8 scale via draft(); anything else is
+    reduced by the biggest whole factor that still leaves at least `largest`.
+    Images with transparency come back premultiplied ("RGBa") so edges don't
+    pick up dark fringes while shrinking.
+    """
+    img = Image.open(path)
+    img.draft(img.mode, (largest, largest))
+    if img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info:
+        img = img.convert('RGBA').convert('RGBa')
+    else:
+        img = img.convert('RGB')
+    factor = max(img.size) // largest
+    if factor > 1:
+        img = img.reduce(factor)
+    return img
+
+
+def downscale(path, sizes):
+    """Returns {size: RGBA image} for every size that doesn't need upscaling.
+
+    Sizes are produced largest first, each from the one before it.
+    """
+    img = None
+    images = {}
+    for size in sorted(set(sizes), reverse=True):
+        if img is None:
+            img = load_source(path, size)
+        if max(img.size) < size:
+            continue
+        img = shrink(img, fit(img.size, size))
+        images[size] = img
+    return {size: image.convert('RGBA') for size, image in images.items()}
+
+
+# --- Building one asset ---
+
+def build_asset(source, ico_path, png_paths):
+    """Writes the .ico (if ico_path) and the {size: path} PNG variants for one source.
+
+    Runs in a worker process; returns the paths written.
+    """
+    ico_sizes = [size for size in ICO_SIZES if size <= ICO_MAX_SIZE] if ico_path else []
+    images = downscale(source, ico_sizes + list(png_paths))
+    written = []
+    if ico_path:
+        frames = [images[size] for size in ico_sizes if size in images]
+        if frames:
+            # The ICO writer reuses a frame of exactly the right size instead of resampling
+            frames.sort(key=lambda frame: max(frame.size), reverse=True)
+            frames[0].save(ico_path, format='ICO', sizes=[frame.size for frame in frames],
+                           append_images=frames[1:])
+            written.append(ico_path)
+    for size, path in png_paths.items():
+        if size in images:
+            images[size].save(path, format='PNG', optimize=True)
+            written.append(path)
+    return written
+
 
 def convert_to_ico(input_image_path, output_icon_path, sizes=None):
     """
@@ -11,42 +140,163 @@ def convert_to_ico(input_image_path, output_icon_path, sizes=None):
         sizes (list of tuples, optional): A list of (width, height) tuples for
                                           the icon sizes to include. Common sizes
                                           for Windows are (16,16), (32,32), (48,48), (256,256).
-                                          If None, Pillow will use its default sizes.
+                                          If None, ICO_SIZES is used.
     """
     try:
-        img = Image.open(input_image_path)
-
-        # Ensure the image has an alpha channel for transparency
-        if img.mode != 'RGBA':
-            img = img.convert('RGBA')
-
-        # Save the image as an ICO file
-        if sizes:
-            img.save(output_icon_path, format='ICO', sizes=sizes)
-        else:
-            img.save(output_icon_path, format='ICO')
-
+        square_sizes = [max(size) for size in sizes] if sizes else ICO_SIZES
+        images = downscale(input_image_path, square_sizes)
+        frames = [images[size] for size in sorted(images, reverse=True) if size <= ICO_MAX_SIZE]
+        frames[0].save(output_icon_path, format='ICO', sizes=[frame.size for frame in frames],
+                       append_images=frames[1:])
         print(f"Successfully converted '{input_image_path}' to '{output_icon_path}'")
     except FileNotFoundError:
         print(f"Error: Input file not found at '{input_image_path}'")
     except Exception as e:
         print(f"An error occurred: {e}")
 
+
+# --- Incremental builds ---
+
+class AssetManifest:
+    """Remembers which source hash produced which outputs, stored as JSON."""
+
+    def __init__(self, path):
+        self.path = path
+        self.assets = {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == PIPELINE_VERSION:
+                self.assets = data.get('assets', {})
+        except (OSError, ValueError):
+            pass
+
+    def is_current(self, source, outputs):
+        """True if `source` is unchanged since it was last built for `outputs`.
+
+        The file's size and mtime are checked first; only when those moved is
+        the content hashed, so a touched-but-identical file is not rebuilt.
+        """
+        entry = self.assets.get(source)
+        if entry is None or entry['requested'] != outputs or not all(map(os.path.exists, entry['written'])):
+            return False
+        stat = os.stat(source)
+        if [stat.st_size, stat.st_mtime_ns] == entry['stat']:
+            return True
+        if file_hash(source) != entry['sha256']:
+            return False
+        entry['stat'] = [stat.st_size, stat.st_mtime_ns]
+        return True
+
+    def record(self, source, requested, written):
+        """`written` can be shorter than `requested`: sizes above the source's own are skipped."""
+        stat = os.stat(source)
+        self.assets[source] = {'sha256': file_hash(source), 'stat': [stat.st_size, stat.st_mtime_ns],
+                               'requested': requested, 'written': written}
+
+    def save(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'version': PIPELINE_VERSION, 'assets': self.assets}, f, indent=1, sort_keys=True)
+
+
+def build_assets(jobs, manifest_path, force=False, workers=None):
+    """Builds every stale (source, ico_path, {size: png_path}) job.
+
+    Returns (built, skipped, errors) where errors are (source, message).
+    Several stale jobs are spread over a process pool; a single one runs inline.
+    """
+    manifest = AssetManifest(manifest_path)
+    stale = []
+    skipped = 0
+    for source, ico_path, png_paths in jobs:
+        outputs = ([ico_path] if ico_path else []) + [png_paths[size] for size in sorted(png_paths)]
+        if not force and manifest.is_current(source, outputs):
+            skipped += 1
+        else:
+            stale.append((source, ico_path, png_paths, outputs))
+
+    built, errors = 0, []
+    if len(stale) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(job, pool.submit(build_asset, *job[:3])) for job in stale]
+            results = [(job, future.exception() or future.result()) for job, future in futures]
+    else:
+        results = []
+        for job in stale:
+            try:
+                results.append((job, build_asset(*job[:3])))
+            except Exception as e:
+                results.append((job, e))
+
+    for (source, _, _, outputs), result in results:
+        if isinstance(result, Exception):
+            errors.append((source, str(result)))
+        else:
+            manifest.record(source, outputs, result)
+            built += 1
+    manifest.save()
+    return built, skipped, errors
+
+
+def app_icon_jobs(source=APP_ICON_SOURCE, ico_path=APP_ICON_OUTPUT, png_dir=APP_ICON_PNG_DIR):
+    """The app's own window icon: icon.ico plus icons/icon_<size>.png."""
+    os.makedirs(png_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(ico_path))[0]
+    return [(source, ico_path, {size: png_variant_path(png_dir, stem, size) for size in PNG_SIZES})]
+
+
+def is_variant_output(name, stems):
+    """True for '<stem>_<size>.png' beside an image called <stem>: a PNG variant from an earlier run."""
+    stem, extension = os.path.splitext(name)
+    base, _, size = stem.rpartition('_')
+    return extension.lower() == '.png' and size.isdigit() and base in stems
+
+
+def directory_jobs(source_dir, output_dir, sizes=PNG_SIZES, ico=True):
+    """One job per image in source_dir (recursively), mirroring its layout under output_dir.
+
+    Outputs written into the source tree by earlier runs are not picked up as
+    new sources: variants beside their source are skipped, and so is an
+    output_dir nested inside source_dir.
+    """
+    jobs = []
+    output_root = os.path.abspath(output_dir)
+    for root, dirs, files in os.walk(source_dir):
+        if os.path.abspath(root) != output_root:
+            dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(root, d)) != output_root]
+        target_dir = os.path.join(output_dir, os.path.relpath(root, source_dir))
+        images = [name for name in sorted(files) if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS]
+        stems = {os.path.splitext(name)[0] for name in images}
+        for name in images:
+            if is_variant_output(name, stems):
+                continue
+            stem = os.path.splitext(name)[0]
+            os.makedirs(target_dir, exist_ok=True)
+            ico_path = os.path.join(target_dir, stem + '.ico') if ico else None
+            jobs.append((os.path.join(root, name), ico_path,
+                         {size: png_variant_path(target_dir, stem, size) for size in sizes}))
+    return jobs
+
+
 if __name__ == "__main__":
-    # Define your input and output paths
-    # You'll need to download the image I generated and place it in the same directory,
-    # or provide its full path. Let's assume you save it as 'crossed_swords_shield.png'.
-    
-    input_file = 'crossed_swords_shield.png' # Make sure this matches your image file name
-    output_file = 'icon.ico'
-
-    # Common icon sizes for good compatibility across Windows
-    # You can customize this list or set it to None to use Pillow's defaults.
-    icon_sizes = [(16,16), (24,24), (32,32), (48,48), (64,64), (128,128), (256,256)]
-
-    convert_to_ico(input_file, output_file, sizes=icon_sizes)
-
-    # Optional: Clean up the generated PNG if you downloaded it just for this conversion
-    # if os.path.exists(input_file):
-    #     os.remove(input_file)
-    #     print(f"Removed temporary input file: {input_file}")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build .ico files and PNG variants from source art.")
+    parser.add_argument('source_dir', nargs='?', help="Directory of art to convert (default: the app icon)")
+    parser.add_argument('output_dir', nargs='?', help="Where batch outputs go (default: SOURCE_DIR)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=PNG_SIZES, help="PNG variant sizes")
+    parser.add_argument('--no-ico', action='store_true', help="Only write PNG variants")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if nothing changed")
+    args = parser.parse_args()
+
+    if args.source_dir:
+        output_dir = args.output_dir or args.source_dir
+        jobs = directory_jobs(args.source_dir, output_dir, args.sizes, ico=not args.no_ico)
+        manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    else:
+        jobs = app_icon_jobs()
+        manifest_path = os.path.join(APP_ICON_PNG_DIR, MANIFEST_NAME)
+
+    built, skipped, errors = build_assets(jobs, manifest_path, force=args.force, workers=args.jobs)
+    print(f"{built} built, {skipped} up to date, {len(errors)} failed")
+    for source, message in errors:
+        print(f"  {source}: {message}")
@@ -0,0 +1,173 @@
+"""
+Derived stats declared as formulas in a dependency graph.
+
+Each derived stat names the stats it depends on (base stats or other derived
+stats) and a formula over their values. Because the graph knows who depends
+on what, a change to one base stat only recomputes the derived stats
+downstream of it: a Will change touches Grit, a Mind change touches Mana and
+the language slots, and so on.
+
+Derived stats can be conditional: a node with `requires` is only active while
+a feature grants that derived stat (the Scholar's Mana). Homebrew derived
+stats register into the same graph, either in code with DerivedGraph.register
+or from a compendium special such as
+    {"derived_stat": "Focus", "formula": {"Mind": 1, "Will": 1}}
+via register_compendium_formulas(), which character_engine.open_compendium
+calls for every compendium a tool opens.
+"""
+
+
+def language_slots(mind):
+    """Number of language slots granted by a Mind score."""
+    return 1 + (mind - 1) // 3
+
+
+class DerivedNode:
+    __slots__ = ("name", "depends_on", "formula", "requires", "pool")
+
+    def __init__(self, name, depends_on, formula, requires, pool):
+        self.name = name
+        self.depends_on = tuple(depends_on)
+        self.formula = formula
+        self.requires = requires
+        self.pool = pool
+
+
+class DerivedGraph:
+    """Formulas for derived stats, evaluated in dependency order.
+
+    Nodes must be registered after everything they depend on, so registration
+    order is always a valid evaluation order.
+    """
+
+    def __init__(self, base_stats):
+        self.base_stats = tuple(base_stats)
+        self.nodes = {}
+        self._dependents = {}
+
+    def register(self, name, depends_on, formula, requires=None, pool=True):
+        """Adds a derived stat.
+
+        `formula` is called with the values of `depends_on`, in order. A node
+        with `requires` is only active while that name is among a character's
+        granted derived stats. `pool` marks stats shown as a current/max bar.
+        """
+        if name in self.nodes or name in self.base_stats:
+            raise ValueError(f"Derived stat '{name}' is already defined.")
+        for dependency in depends_on:
+            if dependency not in self.base_stats and dependency not in self.nodes:
+                raise ValueError(f"'{name}' depends on unknown stat '{dependency}'.")
+        self.nodes[name] = DerivedNode(name, depends_on, formula, requires, pool)
+        for dependency in depends_on:
+            self._dependents.setdefault(dependency, []).append(name)
+
+    def unregister(self, name):
+        """Removes a derived stat that nothing else depends on, e.g. when its compendium is closed."""
+        if self._dependents.get(name):
+            raise ValueError(f"'{name}' is still used by {', '.join(self._dependents[name])}.")
+        node = self.nodes.pop(name)
+        self._dependents.pop(name, None)
+        for dependency in node.depends_on:
+            self._dependents[dependency].remove(name)
+
+    def pools(self):
+        return [name for name, node in self.nodes.items() if node.pool]
+
+    def affected(self, changed):
+        """Names of the derived stats downstream of `changed`, in evaluation order.
+
+        `changed` may hold base stats and derived stat names; a derived name is
+        included itself (used when a feature grants or revokes that stat).
+        """
+        seen = {name for name in changed if name in self.nodes}
+        stack = list(changed)
+        while stack:
+            for dependent in self._dependents.get(stack.pop(), ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    stack.append(dependent)
+        return [name for name in self.nodes if name in seen]
+
+    def _value(self, node, stats, extra_derived, values):
+        """A node's value, or None if it (or something it needs) is inactive."""
+        if node.requires is not None and node.requires not in extra_derived:
+            return None
+        args = []
+        for dependency in node.depends_on:
+            value = stats[dependency] if dependency in stats else values.get(dependency)
+            if value is None:
+                return None
+            args.append(value)
+        return node.formula(*args)
+
+    def evaluate(self, stats, extra_derived=()):
+        """Computes every active derived stat from scratch."""
+        values = {}
+        for node in self.nodes.values():
+            value = self._value(node, stats, extra_derived, values)
+            if value is not None:
+                values[node.name] = value
+        return values
+
+    def recompute(self, stats, extra_derived, values, changed):
+        """Updates `values` in place for the stats affected by `changed`.
+
+        Returns the names whose value changed, appeared or disappeared, in
+        evaluation order, so callers can push just those to the screen.
+        """
+        dirty = []
+        for name in self.affected(changed):
+            value = self._value(self.nodes[name], stats, extra_derived, values)
+            if value is None:
+                if values.pop(name, None) is not None:
+                    dirty.append(name)
+            elif values.get(name) != value:
+                values[name] = value
+                dirty.append(name)
+        return dirty
+
+
+def linear_formula(coefficients):
+    """A formula summing each input multiplied by its coefficient, in the order given."""
+    weights = tuple(coefficients.values())
+    return lambda *values: sum(weight * value for weight, value in zip(weights, values))
+
+
+def register_compendium_formulas(graph, compendium):
+    """Registers homebrew derived stats declared by compendium specials.
+
+    A special with both "derived_stat" and a "formula" of {stat: coefficient}
+    adds a conditional pool granted by that feature. Names already in the
+    graph (Mana, or a stat another feature declared) are left alone.
+    Returns the names it registered. Either every formula is registered or,
+    on ValueError, none of them is.
+    """
+    registered = []
+    try:
+        for entry in compendium.values():
+            special = entry.get("special") or {}
+            name = special.get("derived_stat")
+            formula = special.get("formula")
+            if not (name and formula) or name in graph.nodes:
+                continue
+            # Checked here, not on the first evaluate() inside a Tk callback
+            if not isinstance(formula, dict) or not all(
+                    isinstance(weight, (int, float)) and not isinstance(weight, bool) for weight in formula.values()):
+                raise ValueError(f"The formula for '{name}' must map stats to numbers.")
+            graph.register(name, tuple(formula), linear_formula(formula), requires=name)
+            registered.append(name)
+    except ValueError:
+        for name in reversed(registered):
+            graph.unregister(name)
+        raise
+    return registered
+
+
+def default_graph(base_stats):
+    graph = DerivedGraph(base_stats)
+    graph.register("Health", ("Might",), lambda might: might * 3)
+    graph.register("Stamina", ("Agility",), lambda agility: agility)
+    graph.register("Grit", ("Will",), lambda will: will * 2)
+    graph.register("Mana", ("Mind",), lambda mind: mind * 3, requires="Mana")
+    graph.register("Languages", ("Mind",), language_slots, pool=False)
+    return graph
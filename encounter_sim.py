@@ -0,0 +1,286 @@
+"""
+Monte Carlo encounter simulator for playtesting features.
+
+Runs thousands of fights between two parties at once. Every combatant's base
+stats, derived pools and feature flags are NumPy arrays shaped
+(encounters, combatants), and each round is resolved for all encounters in a
+handful of array operations. Requires NumPy.
+
+The rulebook only describes actions in prose, so the combat model makes these
+assumptions (all tunable through `rules`):
+  - Everyone acts simultaneously each round and regains `stamina_regen` Stamina.
+  - A basic attack costs `attack_cost` Stamina, hits with `hit_chance` shifted by
+    `agility_hit_bonus` per point of Agility difference, and deals Might damage.
+  - Grit is morale: each hit taken costs `grit_per_hit` Grit, and a combatant
+    with no Grit (or no Health) is out of the fight.
+  - Veteran: +1 damage per attack; Blocks with half its remaining Stamina,
+    gaining that much temporary Health for the round.
+  - Knave: double damage while its side outnumbers the enemy (flanking).
+  - Scholar: adds Sparks to its attack, spending 1 Stamina and up to Mind Mana
+    for that much extra, always-hitting damage.
+  - Charlatan: Grit restores every round; Belittles instead of attacking,
+    spending 2 Stamina and X Grit (X up to Will) to drain X Grit from an enemy.
+  - Wanderer: when an ally is below half Health, Aids instead of attacking,
+    restoring its Will in Health to every such ally. Steal is not modelled.
+
+Usage:
+    python encounter_sim.py party_a.jsonl party_b.jsonl [encounters] [compendium.cmp]
+"""
+import sys
+
+import numpy as np
+
+from character_engine import STATS, open_compendium
+
+POOLS = ("Health", "Stamina", "Grit", "Mana")
+FLAG_FEATURES = ("Veteran", "Knave", "Scholar", "Charlatan", "Wanderer")
+
+DEFAULT_RULES = {
+    "max_rounds": 20,
+    "attack_cost": 1,
+    "stamina_regen": 1,
+    "hit_chance": 0.6,
+    "agility_hit_bonus": 0.05,
+    "grit_per_hit": 1,
+    "batch_size": 2000,
+}
+
+
+def party_arrays(characters, side):
+    """Flattens characters into per-combatant arrays (one entry per character)."""
+    stats = np.array([[c.stats[stat] for stat in STATS] for c in characters], dtype=np.int32).reshape(-1, len(STATS))
+    maxima = np.array([[c.derived.get(pool, 0) for pool in POOLS] for c in characters], dtype=np.int32).reshape(-1, len(POOLS))
+    flags = np.array([[feature in c.features for feature in FLAG_FEATURES] for c in characters], dtype=bool).reshape(-1, len(FLAG_FEATURES))
+    return {"stats": stats, "max": maxima, "flags": flags, "side": np.full(len(characters), side, dtype=np.int8)}
+
+
+def store_party_arrays(store, rows, side, compendium):
+    """party_arrays for rows of a roster_store.RosterStore, gathered straight from its columns."""
+    rows = np.asarray(rows, dtype=np.intp)
+    stats = store.column("stats")[rows].astype(np.int32)
+    pool_max = store.column("pool_max")[rows]
+    # A missing pool (NO_POOL) counts as 0, like derived.get(pool, 0) above
+    maxima = np.stack([np.maximum(pool_max[:, store.pools.index(pool)], 0) if pool in store.pools
+                       else np.zeros(len(rows), dtype=np.int16) for pool in POOLS], axis=1).astype(np.int32)
+    flags = np.stack([store.feature_mask(compendium[feature]["id"] if feature in compendium else None)[rows]
+                      for feature in FLAG_FEATURES], axis=1)
+    return {"stats": stats, "max": maxima, "flags": flags, "side": np.full(len(rows), side, dtype=np.int8)}
+
+
+class EncounterReport:
+    """Aggregated results of a simulation run."""
+
+    def __init__(self, names, side, encounters, max_rounds):
+        self.names = names
+        self.side = side
+        self.encounters = 0
+        self.wins = np.zeros(3, dtype=np.int64)              # side A, side B, draw
+        self.survivals = np.zeros(len(names), dtype=np.int64)
+        self.rounds_total = 0
+        # Sums over encounters, per round, side and pool, of the fraction of that pool left
+        self.resource_sums = np.zeros((max_rounds, 2, len(POOLS)))
+        # Sums over encounters, per round and side, of the fraction of fighters unable to attack
+        self.exhaustion_sums = np.zeros((max_rounds, 2))
+
+    @property
+    def win_rates(self):
+        return self.wins / max(self.encounters, 1)
+
+    @property
+    def survival_rates(self):
+        return dict(zip(self.names, self.survivals / max(self.encounters, 1)))
+
+    @property
+    def resource_curves(self):
+        """Mean fraction of each pool remaining, shaped (rounds, side, pool)."""
+        return self.resource_sums / max(self.encounters, 1)
+
+    @property
+    def exhaustion_curves(self):
+        """Mean fraction of each side's fighters short of Stamina to attack, shaped (rounds, side)."""
+        return self.exhaustion_sums / max(self.encounters, 1)
+
+    def summary(self):
+        a, b, draw = self.win_rates
+        lines = [
+            f"{self.encounters} encounters, average {self.rounds_total / max(self.encounters, 1):.1f} rounds",
+            f"Party A wins {a:.1%}, Party B wins {b:.1%}, draws {draw:.1%}",
+            "Survival rates:",
+        ]
+        for (name, rate), side in zip(self.survival_rates.items(), self.side):
+            lines.append(f"  [{'AB'[side]}] {name}: {rate:.1%}")
+        lines.append("Resources left by round (A / B), Health Stamina Grit Mana:")
+        curves = self.resource_curves
+        for round_index in range(0, curves.shape[0], max(1, curves.shape[0] // 5)):
+            a_pools = " ".join(f"{v:.2f}" for v in curves[round_index, 0])
+            b_pools = " ".join(f"{v:.2f}" for v in curves[round_index, 1])
+            lines.append(f"  round {round_index + 1}: {a_pools} / {b_pools}")
+        return "\n".join(lines)
+
+
+def simulate(party_a, party_b, encounters=1000, seed=None, rules=None):
+    """Fights party_a (a list of Characters) against party_b `encounters` times."""
+    names = [c.name or f"A{i + 1}" for i, c in enumerate(party_a)] + [c.name or f"B{i + 1}" for i, c in enumerate(party_b)]
+    return simulate_arrays(party_arrays(party_a, 0), party_arrays(party_b, 1), names, encounters, seed, rules)
+
+
+def simulate_store(store, rows_a, rows_b, compendium, encounters=1000, seed=None, rules=None):
+    """Like simulate, for two sets of rows of a roster_store.RosterStore (e.g. a worker's attached copy)."""
+    names = ([store.name(row) or f"A{i + 1}" for i, row in enumerate(rows_a)]
+             + [store.name(row) or f"B{i + 1}" for i, row in enumerate(rows_b)])
+    return simulate_arrays(store_party_arrays(store, rows_a, 0, compendium),
+                           store_party_arrays(store, rows_b, 1, compendium), names, encounters, seed, rules)
+
+
+def simulate_arrays(a, b, names, encounters=1000, seed=None, rules=None):
+    """Runs the simulation on two parties already flattened by party_arrays or store_party_arrays."""
+    rules = {**DEFAULT_RULES, **(rules or {})}
+    combatants = {key: np.concatenate([a[key], b[key]]) for key in a}
+    report = EncounterReport(names, combatants["side"], encounters, rules["max_rounds"])
+    rng = np.random.default_rng(seed)
+
+    remaining = encounters
+    while remaining > 0:
+        batch = min(remaining, rules["batch_size"])
+        _simulate_batch(combatants, batch, rng, rules, report)
+        remaining -= batch
+    return report
+
+
+def _simulate_batch(combatants, batch, rng, rules, report):
+    stats, maxima, flags, side = combatants["stats"], combatants["max"], combatants["flags"], combatants["side"]
+    n = len(side)
+    might, agility, mind, will = (stats[:, i] for i in range(len(STATS)))
+    hp_max, sta_max, grit_max, mana_max = (maxima[:, i] for i in range(len(POOLS)))
+    veteran, knave, scholar, charlatan, wanderer = (flags[:, i] for i in range(len(FLAG_FEATURES)))
+    enemies = side[:, None] != side[None, :]
+    allies = ~enemies
+    on_side = np.stack([side == 0, side == 1])                      # (2, n)
+    # bool @ bool is a bool ("anyone?"); head counts need integers
+    side_counts = on_side.T.astype(np.int32)                        # (n, 2)
+
+    # State rows are the fights still going; `live` maps them back to encounter numbers.
+    # Finished fights are dropped each round, so late rounds only pay for the long fights.
+    live = np.arange(batch)
+    hp = np.broadcast_to(hp_max, (batch, n)).astype(np.int32)
+    sta = np.broadcast_to(sta_max, (batch, n)).astype(np.int32)
+    grit = np.broadcast_to(grit_max, (batch, n)).astype(np.int32)
+    mana = np.broadcast_to(mana_max, (batch, n)).astype(np.int32)
+    final_hp = np.empty((batch, n), dtype=np.int32)
+    final_grit = np.empty((batch, n), dtype=np.int32)
+    end_round = np.full(batch, rules["max_rounds"], dtype=np.int32)
+    pool_max_by_side = np.stack([on_side @ pool_max for pool_max in (hp_max, sta_max, grit_max, mana_max)], axis=1)
+    # Curve contributions of finished fights: their final state, repeated in every later round
+    frozen_resources = np.zeros((2, len(POOLS)))
+    frozen_exhaustion = np.zeros(2)
+
+    def pick_targets(active, mask):
+        """A random active combatant from `mask` (per actor) for every actor; -1 if none."""
+        candidates = mask[None, :, :] & active[:, None, :]
+        scores = np.where(candidates, rng.random((len(active), n, n)), -1.0)
+        targets = scores.argmax(axis=2)
+        return np.where(candidates.any(axis=2), targets, -1)
+
+    def scatter(targets, amounts):
+        """Sums amounts onto their targets: returns (fights, n)."""
+        fights = len(targets)
+        valid = targets >= 0
+        flat = (np.arange(fights)[:, None] * n + np.where(valid, targets, 0)).ravel()
+        return np.bincount(flat, weights=np.where(valid, amounts, 0).ravel(), minlength=fights * n).reshape(fights, n)
+
+    for round_index in range(rules["max_rounds"]):
+        active = (hp > 0) & (grit > 0)
+        # Start of round: stamina regenerates, Charlatans restore Grit
+        sta = np.where(active, np.minimum(sta + rules["stamina_regen"], sta_max), sta)
+        grit = np.where(active & charlatan, grit_max, grit)
+
+        # Wanderer Aid: restore Will health to every ally below half health
+        hurt = active & (hp * 2 < hp_max)
+        side_hurt = np.stack([(hurt & on_side[s]).any(axis=1) for s in (0, 1)], axis=1)     # (fights, 2)
+        aiding = active & wanderer & side_hurt[:, side]
+        heal = (aiding * will) @ allies.astype(np.int32)                                  # per recipient
+        hp = np.where(hurt, np.minimum(hp + heal, hp_max), hp)
+
+        # Charlatan Belittle: 2 Stamina and X Grit to drain X Grit from an enemy
+        belittle_x = np.minimum(grit - 1, will)
+        belittling = active & charlatan & ~aiding & (sta >= 2) & (belittle_x >= 1)
+        belittle_x = np.where(belittling, belittle_x, 0)
+        sta = sta - 2 * belittling
+        grit = grit - belittle_x
+
+        # Basic attacks, with Veteran, Knave and Scholar riders
+        attacking = active & ~aiding & ~belittling & (sta >= rules["attack_cost"])
+        sta = sta - rules["attack_cost"] * attacking
+        targets = pick_targets(active, enemies)
+        attackers_targets = np.where(attacking, targets, -1)
+        target_agility = agility[np.maximum(targets, 0)]
+        chance = rules["hit_chance"] + rules["agility_hit_bonus"] * (agility - target_agility)
+        hits = attacking & (rng.random(hp.shape) < chance) & (targets >= 0)
+        own_count = active.astype(np.int32) @ side_counts                                  # (fights, 2)
+        flanking = own_count[:, side] > own_count[:, 1 - side]
+        damage = (might + veteran) * np.where(knave & flanking, 2, 1) * hits
+        sparks = attacking & scholar & (mana > 0) & (sta >= 1) & (targets >= 0)
+        sparks_x = np.where(sparks, np.minimum(mana, mind), 0)
+        mana = mana - sparks_x
+        sta = sta - sparks
+        damage = damage + sparks_x
+
+        # Veteran Block: half the remaining stamina becomes temporary health this round
+        block = np.where(active & veteran, sta // 2, 0)
+        sta = sta - block
+
+        belittle_targets = np.where(belittling, pick_targets(active, enemies), -1)
+        incoming = scatter(attackers_targets, damage)
+        hits_taken = scatter(attackers_targets, hits | sparks)
+        grit_drain = scatter(belittle_targets, belittle_x)
+
+        hp = np.maximum(hp - np.maximum(incoming - block, 0).astype(np.int32), 0)
+        grit = np.maximum(grit - (grit_drain + hits_taken * rules["grit_per_hit"]).astype(np.int32), 0)
+
+        # Record resource and exhaustion curves, per fight so finished ones can be frozen
+        active = (hp > 0) & (grit > 0)
+        resources = np.stack([(pool @ on_side.T) / np.maximum(pool_max_by_side[:, pool_index], 1)
+                              for pool_index, pool in enumerate((hp, sta, grit, mana))], axis=2)  # (fights, 2, pools)
+        fighters = np.maximum(active.astype(np.int32) @ side_counts, 1)
+        exhaustion = ((active & (sta < rules["attack_cost"])).astype(np.int32) @ side_counts) / fighters
+        report.resource_sums[round_index] += resources.sum(axis=0) + frozen_resources
+        report.exhaustion_sums[round_index] += exhaustion.sum(axis=0) + frozen_exhaustion
+
+        standing = (active[:, None, :] & on_side[None, :, :]).any(axis=2)                # (fights, 2)
+        over = ~standing.all(axis=1)
+        if not over.any():
+            continue
+        finished = live[over]
+        end_round[finished] = round_index + 1
+        final_hp[finished], final_grit[finished] = hp[over], grit[over]
+        frozen_resources += resources[over].sum(axis=0)
+        frozen_exhaustion += exhaustion[over].sum(axis=0)
+        going = ~over
+        live, hp, sta, grit, mana = live[going], hp[going], sta[going], grit[going], mana[going]
+        if not len(live):
+            # Every fight is over: later rounds hold each fight's final state
+            report.resource_sums[round_index + 1:] += frozen_resources
+            report.exhaustion_sums[round_index + 1:] += frozen_exhaustion
+            break
+    final_hp[live], final_grit[live] = hp, grit
+
+    standing = ((final_hp > 0) & (final_grit > 0))[:, None, :] & on_side[None, :, :]
+    a_standing, b_standing = standing.any(axis=2).T
+    report.wins += [np.sum(a_standing & ~b_standing), np.sum(b_standing & ~a_standing), np.sum(a_standing == b_standing)]
+    report.survivals += (final_hp > 0).sum(axis=0)
+    report.rounds_total += int(end_round.sum())
+    report.encounters += batch
+
+
+if __name__ == "__main__":
+    from character_io import iter_roster
+    from compendium import default_compendium_path
+
+    if len(sys.argv) not in (3, 4, 5):
+        print(__doc__)
+        sys.exit(1)
+    compendium = open_compendium(sys.argv[4] if len(sys.argv) == 5 else default_compendium_path())
+    party_a = list(iter_roster(sys.argv[1], compendium))
+    party_b = list(iter_roster(sys.argv[2], compendium))
+    encounters = int(sys.argv[3]) if len(sys.argv) >= 4 else 1000
+    print(simulate(party_a, party_b, encounters).summary())
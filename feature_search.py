@@ -0,0 +1,95 @@
+"""
+Type-ahead search over compendium feature names.
+
+Names are indexed two ways: a sorted list of case-folded names for prefix
+lookups (binary search), and an n-gram inverted index (all 1-, 2- and 3-grams)
+for substring matches. A query only touches the postings for its own grams, so
+results come back in microseconds even for compendiums with thousands of
+features. Descriptions can optionally be indexed too.
+"""
+from bisect import bisect_left
+from heapq import nsmallest
+
+GRAM_SIZE = 3
+# Sorts after every string starting with the query, so (query + PREFIX_END) bounds the prefix run
+PREFIX_END = chr(0x10FFFF)
+
+
+def _grams(text):
+    """All substrings of text up to GRAM_SIZE characters long."""
+    grams = set()
+    for size in range(1, GRAM_SIZE + 1):
+        for start in range(len(text) - size + 1):
+            grams.add(text[start:start + size])
+    return grams
+
+
+class FeatureSearchIndex:
+    """Prefix and n-gram index over feature names (and optionally descriptions)."""
+
+    def __init__(self, compendium, include_descriptions=False):
+        self.names = list(compendium.keys())
+        self._folded = [name.casefold() for name in self.names]
+        self._exact = {folded: i for i, folded in enumerate(self._folded)}
+        self._sorted = sorted((folded, i) for i, folded in enumerate(self._folded))
+        self._postings = {}
+        for i, folded in enumerate(self._folded):
+            for gram in _grams(folded):
+                self._postings.setdefault(gram, set()).add(i)
+
+        # Descriptions are long, so they are indexed by trigrams only and verified on match
+        self._descriptions = None
+        self._description_postings = {}
+        if include_descriptions:
+            self._descriptions = [compendium[name]["description"].casefold() for name in self.names]
+            for i, text in enumerate(self._descriptions):
+                for start in range(len(text) - GRAM_SIZE + 1):
+                    self._description_postings.setdefault(text[start:start + GRAM_SIZE], set()).add(i)
+
+    def resolve(self, text):
+        """Returns the feature name matching text exactly (ignoring case), or None."""
+        i = self._exact.get(text.strip().casefold())
+        return self.names[i] if i is not None else None
+
+    def search(self, query, limit=20):
+        """Returns up to `limit` feature names matching query, best matches first.
+
+        Name prefixes rank first, then names containing the query, then (if
+        indexed) features whose description contains it. Ties keep compendium order.
+        """
+        query = query.strip().casefold()
+        if not query:
+            return self.names[:limit]
+
+        # Prefix matches: a contiguous run of the sorted names, cut to the limit in compendium order
+        start = bisect_left(self._sorted, (query, -1))
+        end = bisect_left(self._sorted, (query + PREFIX_END, -1), start)
+        results = nsmallest(limit, (i for _, i in self._sorted[start:end]))
+        seen = set(results)
+
+        if len(results) < limit:
+            substring = sorted(i for i in self._candidates(query, self._postings) - seen
+                               if query in self._folded[i])
+            results.extend(substring[:limit - len(results)])
+            seen.update(substring)
+
+        if len(results) < limit and self._descriptions is not None and len(query) >= GRAM_SIZE:
+            in_description = sorted(i for i in self._candidates(query, self._description_postings) - seen
+                                    if query in self._descriptions[i])
+            results.extend(in_description[:limit - len(results)])
+
+        return [self.names[i] for i in results]
+
+    @staticmethod
+    def _candidates(query, postings):
+        """Ids that contain every gram of the query (a superset of the true matches)."""
+        if len(query) <= GRAM_SIZE:
+            return set(postings.get(query, ()))
+        grams = sorted((query[i:i + GRAM_SIZE] for i in range(len(query) - GRAM_SIZE + 1)),
+                       key=lambda gram: len(postings.get(gram, ())))
+        candidates = set(postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= postings.get(gram, set())
+        return candidates
@@ -0,0 +1,93 @@
+"""
+GM dashboard: every connected player sheet in one table, updated live.
+
+Deltas arrive on the network thread and are queued; the Tk side drains the
+queue with an `after` pump and only rewrites the rows that changed.
+
+Usage:
+    python gm_dashboard.py [HOST[:PORT]]
+"""
+import queue
+import sys
+import tkinter as tk
+from tkinter import ttk
+
+from character_engine import STATS
+from live_sync import DEFAULT_HOST, apply_delta, parse_address, tcp_connector
+
+PUMP_INTERVAL_MS = 100
+POOLS = ("Health", "Stamina", "Grit", "Mana")
+COLUMNS = ("Name",) + STATS + POOLS + ("Features",)
+
+
+def row_values(state):
+    values = [state.get("name") or "Unnamed"]
+    values.extend(state.get(f"stat.{stat}", "") for stat in STATS)
+    for pool in POOLS:
+        bar = state.get(f"pool.{pool}")
+        values.append(f"{bar[0]}/{bar[1]}" if bar else "")
+    values.append(len(state.get("features", ())))
+    return values
+
+
+class GMDashboard(tk.Tk):
+    def __init__(self, connect):
+        super().__init__()
+        self.title("Flutter GM Dashboard")
+        self.geometry("1000x500")
+        self.configure(bg="#1e1e1e")
+        self.sheets = {}
+        self.messages = queue.Queue()
+
+        self.tree = ttk.Treeview(self, columns=COLUMNS, show="headings")
+        for column in COLUMNS:
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=160 if column == "Name" else 70, anchor="w" if column == "Name" else "center")
+        self.tree.pack(fill="both", expand=True)
+        self.status = ttk.Label(self, text="Waiting for sheets...")
+        self.status.pack(fill="x")
+
+        # on_message runs on the network thread; only the queue crosses over to Tk
+        self.transport = connect({"t": "hello", "role": "gm"}, on_message=self.messages.put)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.pump()
+
+    def pump(self):
+        changed = set()
+        try:
+            while True:
+                message = self.messages.get_nowait()
+                for sheet_id in message.get("r", ()):
+                    self.sheets.pop(sheet_id, None)
+                for sheet_id, delta in message.get("s", {}).items():
+                    if delta is None:
+                        self.sheets.pop(sheet_id, None)
+                    else:
+                        apply_delta(self.sheets.setdefault(sheet_id, {}), delta)
+                    changed.add(sheet_id)
+        except queue.Empty:
+            pass
+        for sheet_id in changed:
+            self.refresh_row(sheet_id)
+        if changed:
+            self.status.config(text=f"{len(self.sheets)} sheets connected")
+        self.after(PUMP_INTERVAL_MS, self.pump)
+
+    def refresh_row(self, sheet_id):
+        state = self.sheets.get(sheet_id)
+        if state is None:
+            if self.tree.exists(sheet_id):
+                self.tree.delete(sheet_id)
+        elif self.tree.exists(sheet_id):
+            self.tree.item(sheet_id, values=row_values(state))
+        else:
+            self.tree.insert("", "end", iid=sheet_id, values=row_values(state))
+
+    def on_close(self):
+        self.transport.close()
+        self.destroy()
+
+
+if __name__ == "__main__":
+    host, port = parse_address(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_HOST)
+    GMDashboard(tcp_connector(host, port)).mainloop()
@@ -0,0 +1,266 @@
+"""
+Autosave journal with undo and redo.
+
+Each change to the roster is appended to the journal file as one small JSON
+event, so a bar click costs a line instead of a rewrite of every sheet. Every
+SNAPSHOT_EVERY events the file is compacted to a single snapshot of the whole
+roster. Recovery loads the last snapshot and replays the short tail after it.
+A torn last line from a crash mid-write is ignored.
+
+    {"e":"snap","c":[[0,{record}],...],"cur":0,"a":null,"k":1}
+    {"e":"new","k":1,"r":{record}}                       a character joined the roster
+    {"e":"add","k":1,"f":["scholar","Mind"]}              feature added ("rm": removed)
+    {"e":"add","k":1,"n":"Lucky","s":"None","d":"..."}   custom feature added or removed
+    {"e":"pool","k":1,"p":"Health","v":7,"o":9}          bar moved from o to v (null: full)
+    {"e":"meta","k":1,"n":"Ash","l":["Common"]}          name and languages
+    {"e":"cur","k":1}                                    character shown
+    {"e":"alloc","a":[3,2,3,4]}                          point-buy in progress (null: none)
+
+Records are character_io save records; "k" is the character's key in the
+journal. As in save records, predefined features are [compendium id, stat]
+and only custom features carry their description.
+
+Feature and bar events can be undone. Undo applies the inverse event to the
+character and appends it, so the file stays a plain forward log that
+replays to the current state.
+"""
+import json
+import os
+
+from character_engine import RuleError
+from character_io import character_from_record, character_to_record
+
+SNAPSHOT_EVERY = 500
+UNDO_LIMIT = 200
+
+
+class Journal:
+    """The roster as the journal knows it, plus the open journal file and undo/redo stacks."""
+
+    def __init__(self, path, compendium, snapshot_every=SNAPSHOT_EVERY):
+        self.path = path
+        self.compendium = compendium
+        self.snapshot_every = snapshot_every
+        self.characters = {}     # key -> Character, in roster order
+        self.keys = {}           # id(character) -> key
+        self.details = {}        # key -> (name, languages) last written
+        self.current = None
+        self.allocation = None
+        self.next_key = 0
+        self.undo_stack = []
+        self.redo_stack = []
+        self.events_since_snapshot = 0
+        self.file = None
+
+    # --- Recovery ---
+
+    @classmethod
+    def recover(cls, path, compendium, errors=None):
+        """Rebuilds the last session from a journal file (missing file: empty journal).
+
+        Events that no longer apply (e.g. a feature gone from the compendium) are
+        skipped; with an `errors` list, (line number, message) is appended for each.
+        """
+        journal = cls(path, compendium)
+        if not os.path.exists(path):
+            return journal
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+        start = 0
+        for index in range(len(lines) - 1, -1, -1):
+            if lines[index].startswith('{"e":"snap"'):
+                start = index
+                break
+        for line_number, line in enumerate(lines[start:], start + 1):
+            try:
+                event = json.loads(line)
+            except ValueError:
+                break
+            try:
+                journal._apply(event)
+            except (RuleError, KeyError, TypeError, ValueError) as e:
+                if errors is not None:
+                    errors.append((line_number, str(e)))
+        return journal
+
+    def start(self):
+        """Starts writing: the file is replaced by a snapshot of the current state."""
+        self.compact()
+
+    def close(self):
+        if self.file is not None:
+            self.compact()
+            self.file.close()
+            self.file = None
+
+    def compact(self):
+        """Rewrites the journal as one snapshot; written to a temp file first so a crash loses nothing."""
+        if self.file is not None:
+            self.file.close()
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self._dumps(self.snapshot()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.events_since_snapshot = 0
+
+    def snapshot(self):
+        return {"e": "snap", "c": [[key, character_to_record(character, self.compendium)]
+                                   for key, character in self.characters.items()],
+                "cur": self.current, "a": self.allocation, "k": self.next_key}
+
+    # --- Recording ---
+
+    def key(self, character):
+        return self.keys.get(id(character))
+
+    def track(self, character):
+        """Adds a character that joined the roster (confirmed, loaded or imported)."""
+        key = self.next_key
+        self._add_character(key, character)
+        self._append({"e": "new", "k": key, "r": character_to_record(character, self.compendium)})
+
+    def feature_added(self, character, feature):
+        self._record(self._feature_event("add", character, feature))
+
+    def feature_removed(self, character, feature):
+        self._record(self._feature_event("rm", character, feature))
+
+    def _feature_event(self, kind, character, feature):
+        event = {"e": kind, "k": self.key(character)}
+        entry = self.compendium.get(feature["Name"])
+        if entry is not None:
+            event["f"] = [entry["id"], feature["Stat"]]
+        else:
+            event.update(n=feature["Name"], s=feature["Stat"], d=feature["Description"])
+        return event
+
+    def pool_changed(self, character, pool, old, new):
+        if old != new:
+            self._record({"e": "pool", "k": self.key(character), "p": pool, "v": new, "o": old})
+
+    def details_changed(self, character):
+        """Writes the name and languages if they differ from what was last written."""
+        key = self.key(character)
+        details = (character.name, list(character.languages))
+        if key is not None and self.details.get(key) != details:
+            self.details[key] = details
+            self._append({"e": "meta", "k": key, "n": details[0], "l": details[1]})
+
+    def selected(self, character):
+        key = self.key(character)
+        if key is not None and key != self.current:
+            self.current = key
+            self._append({"e": "cur", "k": key})
+
+    def allocation_changed(self, stats):
+        """Point-buy values in STATS order, or None once the allocation is confirmed or abandoned."""
+        self.allocation = list(stats) if stats is not None else None
+        self._append({"e": "alloc", "a": self.allocation})
+
+    # --- Undo and redo ---
+
+    def undo(self):
+        """Reverts the last undoable change. Returns the character it touched, or None.
+
+        If the change can't be reverted (RuleError), it stays on the undo stack.
+        """
+        if not self.undo_stack:
+            return None
+        event = self.undo_stack[-1]
+        self._replay(inverse(event))
+        self.redo_stack.append(self.undo_stack.pop())
+        return self.characters[event["k"]]
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        event = self.redo_stack[-1]
+        self._replay(event)
+        self.undo_stack.append(self.redo_stack.pop())
+        return self.characters[event["k"]]
+
+    def _replay(self, event):
+        self._apply(event)
+        self._append(event)
+
+    # --- Internals ---
+
+    def _record(self, event):
+        self._append(event)
+        self.undo_stack.append(event)
+        del self.undo_stack[:-UNDO_LIMIT]
+        self.redo_stack.clear()
+
+    def _append(self, event):
+        if self.file is None:
+            return
+        self.file.write(self._dumps(event))
+        self.file.flush()
+        self.events_since_snapshot += 1
+        if self.events_since_snapshot >= self.snapshot_every:
+            self.compact()
+
+    @staticmethod
+    def _dumps(event):
+        return json.dumps(event, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+    def _add_character(self, key, character):
+        self.characters[key] = character
+        self.keys[id(character)] = key
+        self.details[key] = (character.name, list(character.languages))
+        self.next_key = max(self.next_key, key + 1)
+
+    def _apply(self, event):
+        """Applies one event to the in-memory characters."""
+        kind = event["e"]
+        if kind == "snap":
+            self.characters, self.keys, self.details = {}, {}, {}
+            for key, record in event["c"]:
+                self._add_character(key, character_from_record(record, self.compendium))
+            self.current, self.allocation, self.next_key = event["cur"], event["a"], event["k"]
+        elif kind == "new":
+            self._add_character(event["k"], character_from_record(event["r"], self.compendium))
+        elif kind == "alloc":
+            self.allocation = event["a"]
+        elif kind == "cur":
+            self.current = event["k"]
+        else:
+            character = self.characters[event["k"]]
+            if kind in ("add", "rm"):
+                name, stat, entry = self._feature(event)
+            if kind == "add":
+                description = entry["description"] if entry is not None else event["d"]
+                character.add_feature(name, stat, description, self.compendium)
+            elif kind == "rm":
+                feature = character.find_feature(name)
+                if feature is None:
+                    raise RuleError(f"'{name}' is not on this character.")
+                character.remove_feature(feature["Id"], self.compendium)
+            elif kind == "pool":
+                if event["v"] is None:
+                    character.pools.pop(event["p"], None)
+                else:
+                    character.pools[event["p"]] = event["v"]
+            elif kind == "meta":
+                character.name, character.languages = event["n"], list(event["l"])
+                self.details[event["k"]] = (character.name, list(character.languages))
+
+    def _feature(self, event):
+        """(name, stat, compendium entry or None) of a feature event."""
+        if "f" not in event:
+            return event["n"], event["s"], None
+        feature_id, stat = event["f"]
+        entry = self.compendium.by_id(feature_id)
+        if entry is None:
+            raise RuleError(f"Feature '{feature_id}' is not in this compendium.")
+        return entry["name"], stat, entry
+
+
+def inverse(event):
+    """The event that undoes an undoable one."""
+    if event["e"] == "pool":
+        return dict(event, v=event["o"], o=event["v"])
+    return dict(event, e="rm" if event["e"] == "add" else "add")
@@ -0,0 +1,375 @@
+"""
+Live sync between player sheets and a GM dashboard.
+
+Each CharacterCreator can publish its current character as a "sheet": a flat
+dict such as {"name": "Ash", "stat.Might": 4, "pool.Health": [7, 12],
+"features": [...]}. Only the keys that changed are sent. A burst of clicks
+within PUBLISH_INTERVAL_MS becomes one delta. The server keeps the latest
+state of every sheet and forwards deltas to subscribed GMs, merged into one
+message per GM every FANOUT_INTERVAL.
+
+The protocol is newline-delimited JSON over TCP:
+    sheet -> server   {"t":"hello","role":"sheet","id":"3f2a..."}, then {"t":"delta","d":{...}}
+    gm    -> server   {"t":"hello","role":"gm"}
+    server -> gm      {"t":"delta","s":{sheet id: delta or null when it left},"r":[sheet ids sent in full]}
+
+A GM first receives every known sheet in full. The network runs on a
+background thread with its own asyncio loop, so the Tk main loop never waits
+on a socket. LoopbackTransport connects publishers and GMs to a SessionHub
+in-process, for tests and single-machine demos.
+
+Usage:
+    python live_sync.py serve [--host 0.0.0.0] [--port 8765]
+"""
+import argparse
+import asyncio
+import json
+import threading
+import uuid
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+PUBLISH_INTERVAL_MS = 100
+FANOUT_INTERVAL = 0.05
+RECONNECT_DELAY = 2.0
+
+
+def sheet_state(character, name=None):
+    """The flat, JSON-ready state a sheet publishes for a character."""
+    state = {"name": character.name if name is None else name}
+    for stat, value in character.stats.items():
+        state[f"stat.{stat}"] = value
+    derived = character.derived
+    for pool, value in character.current_pools().items():
+        state[f"pool.{pool}"] = [value, derived[pool]]
+    state["features"] = [feature["Name"] for feature in character.features]
+    return state
+
+
+def diff(old, new):
+    """Keys of `new` that differ from `old`, plus None for keys that disappeared."""
+    delta = {key: value for key, value in new.items() if old.get(key) != value}
+    delta.update((key, None) for key in old.keys() - new.keys())
+    return delta
+
+
+def apply_delta(state, delta):
+    for key, value in delta.items():
+        if value is None:
+            state.pop(key, None)
+        else:
+            state[key] = value
+
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def send_loop(queue, writer):
+    """Writes queued messages in order, draining after each so a slow peer pushes back."""
+    try:
+        while True:
+            writer.write(encode(await queue.get()))
+            await writer.drain()
+    except ConnectionError:
+        pass
+
+
+# --- Server side ---
+
+class SessionHub:
+    """Latest state of every sheet and the GMs watching them, independent of the transport.
+
+    Incoming deltas are merged per subscriber until flush(), so a GM gets one
+    message per tick however many sheets changed.
+    """
+
+    def __init__(self):
+        self.sheets = {}
+        self.subscribers = {}   # token -> send(message)
+        self.pending = {}       # token -> ({sheet id: merged delta or None}, {sheet ids to reset})
+
+    def publish(self, sheet_id, delta, full=False):
+        """Applies a sheet's delta; `full` replaces its whole state (first message after connecting)."""
+        full = full or sheet_id not in self.sheets
+        if full:
+            self.sheets[sheet_id] = dict(delta)
+        else:
+            apply_delta(self.sheets[sheet_id], delta)
+        for deltas, resets in self.pending.values():
+            # A GM that hasn't seen this sheet (or saw it leave this tick) needs all of it
+            if full or sheet_id in resets or (sheet_id in deltas and deltas[sheet_id] is None):
+                deltas[sheet_id] = dict(self.sheets[sheet_id])
+                resets.add(sheet_id)
+            else:
+                deltas.setdefault(sheet_id, {}).update(delta)
+
+    def leave(self, sheet_id):
+        if self.sheets.pop(sheet_id, None) is None:
+            return
+        for deltas, resets in self.pending.values():
+            deltas[sheet_id] = None
+            resets.discard(sheet_id)
+
+    def subscribe(self, send):
+        """Registers a GM; it is sent every current sheet in full right away. Returns a token."""
+        token = object()
+        self.subscribers[token] = send
+        self.pending[token] = ({}, set())
+        send({"t": "delta", "s": {sheet_id: dict(state) for sheet_id, state in self.sheets.items()},
+              "r": list(self.sheets)})
+        return token
+
+    def unsubscribe(self, token):
+        self.subscribers.pop(token, None)
+        self.pending.pop(token, None)
+
+    def receive(self, sheet_id, message):
+        """Handles one message from a sheet."""
+        if message.get("t") == "delta":
+            self.publish(sheet_id, message["d"], full=message.get("full", False))
+
+    def flush(self):
+        for token, (deltas, resets) in self.pending.items():
+            if deltas:
+                self.subscribers[token]({"t": "delta", "s": deltas, "r": sorted(resets)})
+                self.pending[token] = ({}, set())
+
+
+class SessionServer:
+    """asyncio TCP server around a SessionHub."""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.hub = SessionHub()
+
+    async def serve(self):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        async with server:
+            while True:
+                await asyncio.sleep(FANOUT_INTERVAL)
+                self.hub.flush()
+
+    async def _handle(self, reader, writer):
+        try:
+            hello = json.loads(await reader.readline() or b"{}")
+        except ValueError:
+            hello = {}
+        role = hello.get("role")
+        if role == "gm":
+            # The hub sends synchronously, so messages are queued and drained by a task per GM
+            queue = asyncio.Queue()
+            token = self.hub.subscribe(queue.put_nowait)
+            sender = asyncio.ensure_future(send_loop(queue, writer))
+            try:
+                await reader.read()   # nothing is expected from a GM; wait for it to disconnect
+            finally:
+                self.hub.unsubscribe(token)
+                sender.cancel()
+        elif role == "sheet" and hello.get("id"):
+            sheet_id = str(hello["id"])
+            try:
+                async for line in reader:
+                    try:
+                        self.hub.receive(sheet_id, json.loads(line))
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        continue
+            except ConnectionError:
+                pass
+            finally:
+                self.hub.leave(sheet_id)
+        writer.close()
+
+
+# --- Client side ---
+
+class TcpTransport:
+    """A connection to a SessionServer, run by an asyncio loop on a daemon thread.
+
+    send() may be called from any thread and never blocks. Messages from the
+    server go to on_message on the network thread. on_connect is called there
+    too, after every (re)connect and hello, so a publisher can resend its full
+    state.
+    """
+
+    def __init__(self, hello, host=DEFAULT_HOST, port=DEFAULT_PORT, on_message=None, on_connect=None):
+        self.hello = hello
+        self.host = host
+        self.port = port
+        self.on_message = on_message
+        self.on_connect = on_connect
+        self.loop = asyncio.new_event_loop()
+        self.queue = None
+        self.writer = None
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def send(self, message):
+        if not self.closed:
+            self.loop.call_soon_threadsafe(self._enqueue, message)
+
+    def close(self):
+        self.closed = True
+        self.loop.call_soon_threadsafe(self._shutdown)
+
+    def _shutdown(self):
+        async def shutdown():
+            if self.writer is not None:
+                # Messages sent just before close() (a publisher's last delta) still go out
+                try:
+                    while not self.queue.empty():
+                        self.writer.write(encode(self.queue.get_nowait()))
+                    await self.writer.drain()
+                except ConnectionError:
+                    pass
+                self.writer.close()
+                try:
+                    await self.writer.wait_closed()
+                except ConnectionError:
+                    pass
+            self.loop.stop()
+        self.loop.create_task(shutdown())
+
+    def _enqueue(self, message):
+        if self.queue is not None:
+            self.queue.put_nowait(message)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.create_task(self._connect_forever())
+        self.loop.run_forever()
+
+    async def _connect_forever(self):
+        while not self.closed:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError:
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+            self.queue = asyncio.Queue()
+            self.writer = writer
+            self.queue.put_nowait(self.hello)
+            if self.on_connect:
+                self.on_connect()
+            sender = asyncio.ensure_future(send_loop(self.queue, writer))
+            try:
+                async for line in reader:
+                    if self.on_message:
+                        self.on_message(json.loads(line))
+            except (ConnectionError, ValueError):
+                pass
+            finally:
+                sender.cancel()
+                self.queue = self.writer = None
+                writer.close()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+class LoopbackTransport:
+    """Connects a publisher or GM straight to an in-process SessionHub; same interface as TcpTransport."""
+
+    def __init__(self, hub, hello, on_message=None, on_connect=None):
+        self.hub = hub
+        self.hello = hello
+        self.token = None
+        if hello["role"] == "gm":
+            self.token = hub.subscribe(on_message)
+        if on_connect:
+            on_connect()
+
+    def send(self, message):
+        self.hub.receive(self.hello["id"], message)
+
+    def close(self):
+        if self.token is not None:
+            self.hub.unsubscribe(self.token)
+        else:
+            self.hub.leave(self.hello["id"])
+
+
+class SheetPublisher:
+    """Turns a stream of full sheet states into coalesced deltas.
+
+    update() is cheap and may be called after every refresh: it diffs against
+    the last state and merges the change into the pending delta. The pending
+    delta is sent once per PUBLISH_INTERVAL_MS through `schedule(ms, fn)`,
+    e.g. a Tk widget's `after`. Without `schedule`, call flush() yourself.
+    """
+
+    def __init__(self, connect, schedule=None, sheet_id=None):
+        self.sheet_id = sheet_id or uuid.uuid4().hex[:12]
+        self.schedule = schedule
+        self.state = {}
+        self.pending = {}
+        self.full = True
+        self.scheduled = False
+        self.lock = threading.Lock()
+        self.transport = None
+        self.transport = connect({"t": "hello", "role": "sheet", "id": self.sheet_id}, on_connect=self.resync)
+
+    def update(self, state):
+        with self.lock:
+            delta = diff(self.state, state)
+            if not delta:
+                return
+            self.state = dict(state)
+            self.pending.update(delta)
+        if self.schedule is not None and not self.scheduled:
+            self.scheduled = True
+            self.schedule(PUBLISH_INTERVAL_MS, self.flush)
+
+    def resync(self):
+        """Sends the whole current state next time (after a (re)connect)."""
+        with self.lock:
+            self.full = True
+            self.pending = dict(self.state)
+        if self.state:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            self.scheduled = False
+            if self.transport is None or not self.pending:
+                return
+            message = {"t": "delta", "d": self.pending}
+            if self.full:
+                message["full"] = True
+                self.full = False
+            self.pending = {}
+        self.transport.send(message)
+
+    def close(self):
+        """Sends any pending delta, then disconnects."""
+        self.flush()
+        self.transport.close()
+
+
+def tcp_connector(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """A `connect` callable for SheetPublisher/GM clients that talks to a SessionServer."""
+    return lambda hello, on_message=None, on_connect=None: TcpTransport(hello, host, port, on_message, on_connect)
+
+
+def loopback_connector(hub):
+    """A `connect` callable that talks to an in-process SessionHub."""
+    return lambda hello, on_message=None, on_connect=None: LoopbackTransport(hub, hello, on_message, on_connect)
+
+
+def parse_address(text):
+    """"host", "host:port" or ":port" -> (host, port)."""
+    host, _, port = text.rpartition(":") if ":" in text else (text, "", "")
+    return host or DEFAULT_HOST, int(port) if port else DEFAULT_PORT
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the live-sync session server.")
+    parser.add_argument("command", choices=["serve"])
+    parser.add_argument("--host", default=DEFAULT_HOST, help="0.0.0.0 to accept sheets from the LAN")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    print(f"Serving sheets on {args.host}:{args.port}")
+    try:
+        asyncio.run(SessionServer(args.host, args.port).serve())
+    except KeyboardInterrupt:
+        pass
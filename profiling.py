@@ -0,0 +1,168 @@
+"""
+Opt-in instrumentation for UI handlers.
+
+A Profiler wraps named handler methods on one object and records call counts
+and wall-time histograms for each. Calls made from inside another wrapped
+handler are nested under it, and self time per call stack is kept so the
+report can be drawn as a flame graph. While started, it also counts the
+widgets created and destroyed and the Tk variable writes. These counts are
+charged to the interaction (the outermost wrapped call) they happened in.
+
+Nothing is wrapped or patched unless a Profiler is created and used, so the
+app runs unchanged when profiling is off.
+
+    python stat_block.py --profile profile.json     # JSON report on exit
+    python stat_block.py --profile profile.folded   # flamegraph.pl / speedscope input
+"""
+import functools
+import json
+import time
+import tkinter as tk
+
+# Upper bucket edges for the wall-time histograms, in milliseconds
+HISTOGRAM_EDGES_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+WIDGETS_CREATED, WIDGETS_DESTROYED, VAR_WRITES = range(3)
+COUNTER_NAMES = ("widgets_created", "widgets_destroyed", "var_writes")
+
+
+class HandlerStats:
+    __slots__ = ("calls", "total", "max", "histogram", "interactions", "counters")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        # Only for calls that were the outermost handler: per-interaction widget/var churn
+        self.interactions = 0
+        self.counters = [0, 0, 0]
+
+    def add(self, elapsed):
+        self.calls += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        ms = elapsed * 1000
+        bucket = 0
+        while bucket < len(HISTOGRAM_EDGES_MS) and ms > HISTOGRAM_EDGES_MS[bucket]:
+            bucket += 1
+        self.histogram[bucket] += 1
+
+    def as_dict(self):
+        labels = [f"<={edge}ms" for edge in HISTOGRAM_EDGES_MS] + [f">{HISTOGRAM_EDGES_MS[-1]}ms"]
+        data = {
+            "calls": self.calls,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / self.calls, 3) if self.calls else 0,
+            "max_ms": round(self.max * 1000, 3),
+            "histogram": {label: count for label, count in zip(labels, self.histogram) if count},
+            "interactions": self.interactions,
+        }
+        for name, count in zip(COUNTER_NAMES, self.counters):
+            data[name] = count
+            data[f"{name}_per_interaction"] = round(count / self.interactions, 2) if self.interactions else 0
+        return data
+
+
+class Profiler:
+    """Records timings for wrapped handlers and, while started, widget and variable churn."""
+
+    def __init__(self):
+        self.handlers = {}
+        self.stacks = {}             # "outer;inner" -> self time in seconds
+        self.totals = [0, 0, 0]      # counters over the whole session, inside interactions or not
+        self._stack = []             # [name, start, time spent in wrapped children]
+        self._interaction = [0, 0, 0]
+        self._patched = []
+
+    # --- Handlers ---
+
+    def instrument(self, obj, names):
+        """Replaces each named method on `obj` (the instance, not its class) with a timed wrapper."""
+        for name in names:
+            setattr(obj, name, self.wrap(name, getattr(obj, name)))
+
+    def wrap(self, name, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            if not self._stack:
+                self._interaction = [0, 0, 0]
+            self._stack.append([name, time.perf_counter(), 0.0])
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._finish()
+        return timed
+
+    def _finish(self):
+        name, start, children = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        stats = self.handlers.get(name)
+        if stats is None:
+            stats = self.handlers[name] = HandlerStats()
+        stats.add(elapsed)
+        path = ";".join([frame[0] for frame in self._stack] + [name])
+        self.stacks[path] = self.stacks.get(path, 0.0) + elapsed - children
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        else:
+            stats.interactions += 1
+            for i, count in enumerate(self._interaction):
+                stats.counters[i] += count
+
+    # --- Widget and variable counters ---
+
+    def start(self):
+        """Starts counting widget creation/destruction and Tk variable writes (patches tkinter)."""
+        if self._patched:
+            return
+        self._patch(tk.BaseWidget, "_setup", WIDGETS_CREATED)
+        self._patch(tk.BaseWidget, "destroy", WIDGETS_DESTROYED)
+        self._patch(tk.Variable, "set", VAR_WRITES)
+        self._patch(tk.BooleanVar, "set", VAR_WRITES)
+
+    def stop(self):
+        """Restores the patched tkinter methods."""
+        while self._patched:
+            cls, attribute, original = self._patched.pop()
+            setattr(cls, attribute, original)
+
+    def _patch(self, cls, attribute, counter):
+        original = cls.__dict__[attribute]
+
+        @functools.wraps(original)
+        def counted(*args, **kwargs):
+            self.totals[counter] += 1
+            self._interaction[counter] += 1
+            return original(*args, **kwargs)
+        setattr(cls, attribute, counted)
+        self._patched.append((cls, attribute, original))
+
+    # --- Reports ---
+
+    def report(self):
+        return {
+            "handlers": {name: stats.as_dict() for name, stats in sorted(self.handlers.items())},
+            "totals": dict(zip(COUNTER_NAMES, self.totals)),
+        }
+
+    def folded(self):
+        """Folded stacks ("outer;inner microseconds" per line) for flame graph tools."""
+        return "".join(f"{path} {round(seconds * 1e6)}\n" for path, seconds in sorted(self.stacks.items()))
+
+    def save(self, path):
+        """Writes folded stacks if path ends in .folded or .txt, JSON otherwise."""
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith((".folded", ".txt")):
+                f.write(self.folded())
+            else:
+                json.dump(self.report(), f, indent=2)
+
+    def summary(self):
+        lines = [f"{'handler':<26}{'calls':>7}{'mean ms':>10}{'max ms':>10}{'widgets +/-':>14}{'var writes':>12}"]
+        for name, stats in sorted(self.handlers.items(), key=lambda item: -item[1].total):
+            data = stats.as_dict()
+            churn = f"{data['widgets_created_per_interaction']}/{data['widgets_destroyed_per_interaction']}"
+            lines.append(f"{name:<26}{stats.calls:>7}{data['mean_ms']:>10}{data['max_ms']:>10}"
+                         f"{churn:>14}{data['var_writes_per_interaction']:>12}")
+        return "\n".join(lines)
@@ -0,0 +1,392 @@
+"""
+Column-oriented roster store for large NPC populations.
+
+A Character is a few dicts and a FeatureStore: fine for the characters on
+screen, but kilobytes each for a town of several thousand NPCs. RosterStore
+keeps the same state in typed NumPy columns, one row per character, all in a
+single shared-memory block:
+
+    stats           uint8   (rows, 4)       base stats, feature increases included
+    pool_max        int16   (rows, pools)   NO_POOL where the character lacks the pool
+    pool_current    int16   (rows, pools)
+    feature_count   uint8   (rows,)
+    feature_id      uint16  (rows, width)   index into the store's feature table
+    feature_stat    int8    (rows, width)   index into STATS, -1 for "None"
+    name_start      uint32  (rows,)         UTF-8 name in the name heap
+    name_length     uint16  (rows,)
+    language_start  uint32  (rows,)         language table ids in the language heap, in sheet order
+    language_count  uint16  (rows,)
+
+That is about 60 bytes a character plus its name and 4 bytes per language.
+The feature table holds compendium ids, or (name, description) for custom
+features, and the language table every distinct language, so each is stored
+once however many characters have it.
+
+Worker processes (simulation, export, validation) attach with the small
+picklable handle() and read the columns in place; nothing is copied or
+unpickled per character. The GUI still binds its Tk variables to one
+Character at a time: character(row) builds it and write(row) stores it back.
+
+Growing the store (more rows, longer feature lists, fuller heaps, new
+features or languages) moves it to a new block. Handles and column views
+describe the block they were taken from, so take them after the last append.
+
+Usage:
+    python roster_store.py roster.jsonl [--compendium PATH]
+"""
+import argparse
+import json
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from character_engine import DERIVED_GRAPH, MIN_STAT, NO_STAT, STATS, TOTAL_POINTS, open_compendium
+from character_io import FORMAT_VERSION, character_from_record, iter_roster
+
+INITIAL_ROWS = 256
+INITIAL_FEATURE_WIDTH = 8
+# Elements, not bytes: name bytes and language ids
+INITIAL_HEAP_SIZES = {"name": 4096, "language": 1024}
+MAX_FEATURES = np.iinfo(np.uint8).max
+NO_POOL = -1
+
+# Variable-length values per row: heap -> (element dtype, start column, length column)
+HEAPS = {"name": (np.uint8, "name_start", "name_length"),
+         "language": (np.uint32, "language_start", "language_count")}
+
+
+def _columns(pools, width):
+    """(name, dtype, per-row shape) of every column."""
+    return [("stats", np.uint8, (len(STATS),)),
+            ("pool_max", np.int16, (len(pools),)),
+            ("pool_current", np.int16, (len(pools),)),
+            ("feature_count", np.uint8, ()),
+            ("feature_id", np.uint16, (width,)),
+            ("feature_stat", np.int8, (width,)),
+            ("name_start", np.uint32, ()),
+            ("name_length", np.uint16, ()),
+            ("language_start", np.uint32, ()),
+            ("language_count", np.uint16, ())]
+
+
+def _layout(pools, width, capacity, heap_sizes):
+    """Byte offset of every column and heap (8-byte aligned), plus the block size."""
+    offsets = {}
+    offset = 0
+    sections = [(name, dtype, capacity * int(np.prod(shape, dtype=int))) for name, dtype, shape in _columns(pools, width)]
+    sections += [(heap, dtype, heap_sizes[heap]) for heap, (dtype, _, _) in HEAPS.items()]
+    for name, dtype, count in sections:
+        offsets[name] = offset
+        offset += -(-count * np.dtype(dtype).itemsize // 8) * 8
+    return offsets, max(offset, 1)
+
+
+class RosterStore:
+    """Many characters as rows of typed columns in one shared-memory block."""
+
+    def __init__(self, capacity=INITIAL_ROWS, feature_width=INITIAL_FEATURE_WIDTH, pools=None):
+        self.pools = tuple(pools or DERIVED_GRAPH.pools())
+        self.count = 0
+        self.heap_used = {heap: 0 for heap in HEAPS}
+        self.features = []           # compendium id, or (name, description) for a custom feature
+        self.feature_index = {}
+        self.language_table = []
+        self.language_index = {}
+        self.owner = True
+        self.shm = None
+        self.columns = {}
+        self.heaps = {}
+        self._allocate(capacity, feature_width, INITIAL_HEAP_SIZES)
+
+    @classmethod
+    def from_characters(cls, characters, compendium):
+        store = cls()
+        try:
+            for character in characters:
+                store.append(character, compendium)
+        except BaseException:
+            # Nobody else holds the block yet, so free it rather than leak it
+            store.close()
+            raise
+        return store
+
+    @classmethod
+    def load_roster(cls, path, compendium, errors=None):
+        """Reads a roster file into a new store, one character at a time (see character_io.iter_roster)."""
+        return cls.from_characters(iter_roster(path, compendium, errors), compendium)
+
+    # --- Sharing ---
+
+    def handle(self):
+        """A small picklable description of the store for attach() in another process."""
+        return {"shm": self.shm.name, "count": self.count, "capacity": self.capacity, "width": self.feature_width,
+                "heap_sizes": dict(self.heap_sizes), "heap_used": dict(self.heap_used), "pools": self.pools,
+                "features": list(self.features), "languages": list(self.language_table)}
+
+    @classmethod
+    def attach(cls, handle):
+        """Maps a store created by another process. It can be read and rows rewritten, but not grown."""
+        store = cls.__new__(cls)
+        store.pools = tuple(handle["pools"])
+        store.count = handle["count"]
+        store.heap_used = dict(handle["heap_used"])
+        store.features = list(handle["features"])
+        store.feature_index = {key: index for index, key in enumerate(store.features)}
+        store.language_table = list(handle["languages"])
+        store.language_index = {language: index for index, language in enumerate(store.language_table)}
+        store.owner = False
+        store.shm = shared_memory.SharedMemory(name=handle["shm"])
+        store._map(handle["capacity"], handle["width"], handle["heap_sizes"])
+        return store
+
+    def close(self):
+        """Unmaps the block; the creating process also frees it."""
+        if self.shm is None:
+            return
+        self.columns = {}
+        self.heaps = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+        self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    # --- Storage ---
+
+    def _map(self, capacity, width, heap_sizes):
+        self.capacity, self.feature_width, self.heap_sizes = capacity, width, dict(heap_sizes)
+        offsets, size = _layout(self.pools, width, capacity, heap_sizes)
+        buffer = self.shm.buf
+        self.columns = {name: np.ndarray((capacity,) + shape, dtype, buffer, offsets[name])
+                        for name, dtype, shape in _columns(self.pools, width)}
+        self.heaps = {heap: np.ndarray((heap_sizes[heap],), dtype, buffer, offsets[heap])
+                      for heap, (dtype, _, _) in HEAPS.items()}
+
+    def _allocate(self, capacity, width, heap_sizes):
+        """Moves the store to a new block of the given size, compacting the heaps on the way."""
+        if not self.owner:
+            raise ValueError("Only the process that created a roster store can grow it.")
+        old_shm, old_columns, old_heaps = self.shm, self.columns, self.heaps
+        self.shm = shared_memory.SharedMemory(create=True, size=_layout(self.pools, width, capacity, heap_sizes)[1])
+        self._map(capacity, width, heap_sizes)
+        if old_shm is None:
+            return
+        rows = self.count
+        span_columns = {column for _, start, length in HEAPS.values() for column in (start, length)}
+        for name, column in old_columns.items():
+            if name not in span_columns:
+                self.columns[name][(slice(0, rows),) + tuple(slice(0, size) for size in column.shape[1:])] = column[:rows]
+        # Rewritten rows leave dead values behind; only live spans are copied
+        for heap, (_, start_column, length_column) in HEAPS.items():
+            starts, lengths = old_columns[start_column][:rows], old_columns[length_column][:rows]
+            new_starts = np.cumsum(lengths, dtype=np.int64) - lengths
+            target, source = self.heaps[heap], old_heaps[heap]
+            for start, length, new_start in zip(starts.tolist(), lengths.tolist(), new_starts.tolist()):
+                target[new_start:new_start + length] = source[start:start + length]
+            self.columns[start_column][:rows] = new_starts
+            self.columns[length_column][:rows] = lengths
+            self.heap_used[heap] = int(lengths.sum())
+        del old_columns, old_heaps, column, starts, lengths, target, source
+        old_shm.close()
+        old_shm.unlink()
+
+    def _intern_feature(self, key):
+        index = self.feature_index.get(key)
+        if index is None:
+            if len(self.features) > np.iinfo(np.uint16).max:
+                raise ValueError("A roster store holds at most 65536 distinct features.")
+            index = self.feature_index[key] = len(self.features)
+            self.features.append(key)
+        return index
+
+    def _intern_language(self, language):
+        index = self.language_index.get(language)
+        if index is None:
+            index = self.language_index[language] = len(self.language_table)
+            self.language_table.append(language)
+        return index
+
+    def _span(self, heap, row):
+        """A row's values in a heap, as a view."""
+        _, start_column, length_column = HEAPS[heap]
+        start = int(self.columns[start_column][row])
+        return self.heaps[heap][start:start + int(self.columns[length_column][row])]
+
+    def _write_span(self, heap, row, values):
+        """Stores a row's values (name bytes, language ids) at the end of a heap, growing it if needed."""
+        _, start_column, length_column = HEAPS[heap]
+        if np.array_equal(self._span(heap, row), values):
+            return
+        used = self.heap_used[heap]
+        if used + len(values) > self.heap_sizes[heap]:
+            heap_sizes = dict(self.heap_sizes)
+            heap_sizes[heap] = max(2 * heap_sizes[heap], used + len(values))
+            self._allocate(self.capacity, self.feature_width, heap_sizes)
+            used = self.heap_used[heap]
+        self.heaps[heap][used:used + len(values)] = values
+        self.columns[start_column][row] = used
+        self.columns[length_column][row] = len(values)
+        self.heap_used[heap] = used + len(values)
+
+    # --- Rows ---
+
+    def append(self, character, compendium):
+        """Stores a Character in a new row and returns the row."""
+        if self.count == self.capacity:
+            self._allocate(2 * self.capacity, self.feature_width, self.heap_sizes)
+        row = self.count
+        for _, start_column, length_column in HEAPS.values():
+            self.columns[start_column][row] = self.columns[length_column][row] = 0
+        self.count += 1
+        try:
+            self.write(row, character, compendium)
+        except ValueError:
+            self.count -= 1
+            raise
+        return row
+
+    def write(self, row, character, compendium):
+        """Stores a Character in an existing row, e.g. the one just edited on screen."""
+        if not 0 <= row < self.count:
+            raise IndexError(f"Row {row} is not in this store.")
+        features = list(character.features)
+        if len(features) > MAX_FEATURES:
+            raise ValueError(f"A roster store holds at most {MAX_FEATURES} features per character.")
+        name = np.frombuffer(character.name.encode("utf-8"), dtype=np.uint8)
+        if len(name) > np.iinfo(np.uint16).max:
+            raise ValueError("Character names are limited to 65535 bytes.")
+        if len(character.languages) > np.iinfo(np.uint16).max:
+            raise ValueError("A character can have at most 65535 languages.")
+        slots = []
+        for feature in features:
+            entry = compendium.get(feature["Name"])
+            key = entry["id"] if entry is not None else (feature["Name"], feature["Description"])
+            slots.append((self._intern_feature(key), STATS.index(feature["Stat"]) if feature["Stat"] in STATS else -1))
+        languages = np.array([self._intern_language(language) for language in character.languages], dtype=np.uint32)
+        if len(slots) > self.feature_width:
+            self._allocate(self.capacity, max(len(slots), 2 * self.feature_width), self.heap_sizes)
+        self._write_span("name", row, name)
+        self._write_span("language", row, languages)
+
+        columns = self.columns
+        columns["stats"][row] = [character.stats[stat] for stat in STATS]
+        derived = character.derived
+        current = character.current_pools()
+        columns["pool_max"][row] = [derived.get(pool, NO_POOL) for pool in self.pools]
+        columns["pool_current"][row] = [current.get(pool, NO_POOL) for pool in self.pools]
+        columns["feature_count"][row] = len(slots)
+        if slots:
+            columns["feature_id"][row, :len(slots)], columns["feature_stat"][row, :len(slots)] = zip(*slots)
+
+    def name(self, row):
+        return self._span("name", row).tobytes().decode("utf-8")
+
+    def languages(self, row):
+        return [self.language_table[index] for index in self._span("language", row).tolist()]
+
+    def record(self, row):
+        """The character_io save record of a row, built without a Character."""
+        columns = self.columns
+        allocation = columns["stats"][row].astype(int)
+        features = []
+        for slot in range(columns["feature_count"][row]):
+            key = self.features[columns["feature_id"][row, slot]]
+            stat_index = int(columns["feature_stat"][row, slot])
+            stat = NO_STAT
+            if stat_index >= 0:
+                stat = STATS[stat_index]
+                allocation[stat_index] -= 1
+            features.append([key, stat] if isinstance(key, str) else {"n": key[0], "s": stat, "d": key[1]})
+        record = {"v": FORMAT_VERSION, "n": self.name(row), "s": allocation.tolist(), "f": features}
+        languages = self.languages(row)
+        if languages:
+            record["l"] = languages
+        pools = {pool: int(current) for pool, current, maximum
+                 in zip(self.pools, columns["pool_current"][row], columns["pool_max"][row])
+                 if maximum != NO_POOL and current != maximum}
+        if pools:
+            record["p"] = pools
+        return record
+
+    def character(self, row, compendium):
+        """Builds the Character for a row, e.g. to show it on the stat block."""
+        return character_from_record(self.record(row), compendium)
+
+    def save(self, path):
+        """Writes the store as a character_io roster file."""
+        with open(path, "w", encoding="utf-8") as f:
+            for row in range(self.count):
+                f.write(json.dumps(self.record(row), separators=(",", ":"), ensure_ascii=False))
+                f.write("\n")
+
+    # --- Column queries ---
+
+    def column(self, name):
+        """The filled rows of a column, as a view into the shared block."""
+        return self.columns[name][:self.count]
+
+    def pool(self, pool, current=True):
+        """Current (or maximum) values of one pool for every row; NO_POOL where it is missing."""
+        return self.column("pool_current" if current else "pool_max")[:, self.pools.index(pool)]
+
+    def feature_mask(self, key):
+        """Which rows have a feature, by compendium id (or (name, description) for a custom one)."""
+        index = self.feature_index.get(key)
+        if index is None:
+            return np.zeros(self.count, dtype=bool)
+        filled = np.arange(self.feature_width) < self.column("feature_count")[:, None]
+        return ((self.column("feature_id") == index) & filled).any(axis=1)
+
+    def invalid_rows(self, start=0, stop=None):
+        """Rows in [start, stop) whose point-buy or bars break the rules, checked a whole slice at a time."""
+        stop = self.count if stop is None else min(stop, self.count)
+        columns = self.columns
+        filled = np.arange(self.feature_width) < columns["feature_count"][start:stop, None]
+        feature_stats = columns["feature_stat"][start:stop]
+        increases = np.stack([((feature_stats == index) & filled).sum(axis=1) for index in range(len(STATS))], axis=1)
+        allocation = columns["stats"][start:stop].astype(np.int32) - increases
+        bad = (allocation < MIN_STAT).any(axis=1)
+        bad |= allocation.sum(axis=1) - MIN_STAT * len(STATS) != TOTAL_POINTS
+        maxima, current = columns["pool_max"][start:stop], columns["pool_current"][start:stop]
+        bad |= ((maxima != NO_POOL) & ((current > maxima) | (current < 0))).any(axis=1)
+        return np.flatnonzero(bad) + start
+
+    def nbytes(self):
+        """Bytes in use: the filled rows of every column plus the live part of each heap."""
+        live = sum(int(self.column(length_column).sum()) * np.dtype(dtype).itemsize
+                   for dtype, _, length_column in HEAPS.values())
+        return sum(column[:self.count].nbytes for column in self.columns.values()) + live
+
+
+if __name__ == "__main__":
+    import time
+
+    from compendium import default_compendium_path
+
+    parser = argparse.ArgumentParser(description="Load a roster into a shared-memory store and check it.")
+    parser.add_argument("roster")
+    parser.add_argument("--compendium", default=default_compendium_path())
+    args = parser.parse_args()
+
+    compendium = open_compendium(args.compendium)
+    errors = []
+    started = time.perf_counter()
+    with RosterStore.load_roster(args.roster, compendium, errors) as store:
+        loaded = time.perf_counter()
+        invalid = store.invalid_rows()
+        checked = time.perf_counter()
+        for line_number, message in errors:
+            print(f"Skipped line {line_number}: {message}")
+        print(f"{len(store)} characters in {store.nbytes()} bytes "
+              f"({store.nbytes() / max(len(store), 1):.0f} per character), "
+              f"{len(store.features)} distinct features, {len(store.language_table)} languages")
+        print(f"Loaded in {(loaded - started) * 1000:.0f} ms, checked in {(checked - loaded) * 1000:.2f} ms, "
+              f"{len(invalid)} invalid rows")
@@ -0,0 +1,315 @@
+"""
+Character sheet export to HTML and PDF.
+
+A sheet shows the name, stats, derived bars, languages and every feature with
+its full description. HTML sheets use a string.Template that is compiled once
+per process (pass --template to use your own). PDFs are laid out as plain
+text pages with the built-in Helvetica fonts, so no PDF library is needed.
+
+Rosters are exported in parallel: each worker process opens the compendium
+and compiles the template once, then renders the characters handed to it.
+With --combined, the whole roster goes into one printable file, one sheet
+per page.
+
+Usage:
+    python sheet_export.py roster.jsonl OUTPUT_DIR [--format html|pdf] [--combined]
+                           [--template sheet.html] [--jobs N] [--compendium PATH]
+"""
+import argparse
+import html
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from string import Template
+
+from character_engine import STATS, open_compendium
+from character_io import character_from_record, character_to_record, iter_roster
+
+FORMATS = ("html", "pdf")
+
+SHEET_TEMPLATE = """<section class="sheet">
+  <h1>$name</h1>
+  <table class="stats"><tr>$stat_headers</tr><tr>$stat_values</tr></table>
+  <h2>Derived</h2>
+  <table class="bars">$bars</table>
+  <h2>Languages</h2>
+  <p>$languages</p>
+  <h2>Features</h2>
+  $features
+</section>
+"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>$title</title>
+<style>
+  body { font-family: "Segoe UI", Helvetica, Arial, sans-serif; margin: 2em; color: #1e1e1e; }
+  h1 { margin-bottom: 0.2em; } h2 { border-bottom: 1px solid #999; font-size: 1.1em; }
+  table.stats td, table.stats th { padding: 0.2em 1em; text-align: center; }
+  table.bars td { padding: 0.1em 0.8em 0.1em 0; }
+  .bar { display: inline-block; width: 12em; height: 0.8em; border: 1px solid #444; }
+  .fill { height: 100%; background: #e63946; }
+  .feature h3 { margin-bottom: 0.1em; } .feature .bonus { color: #666; font-size: 0.9em; }
+  .feature p { white-space: pre-wrap; margin-top: 0.2em; }
+  @page { margin: 1.5cm; }
+  @media print { body { margin: 0; } .sheet { page-break-after: always; } }
+</style></head>
+<body>
+$sheets
+</body></html>
+"""
+
+
+def sheet_data(character):
+    """Everything a sheet shows, as plain values."""
+    derived = character.derived
+    return {
+        "name": character.name or "Unnamed",
+        "stats": [(stat, character.stats[stat]) for stat in STATS],
+        "bars": [(pool, value, derived[pool]) for pool, value in character.current_pools().items()],
+        "languages": list(character.languages) + [lang for lang in character.granted_languages
+                                                  if lang not in character.languages],
+        "features": [(f["Name"], f["Stat"], f["Description"]) for f in character.features],
+    }
+
+
+# --- HTML ---
+
+@lru_cache(maxsize=None)
+def compile_template(path=None):
+    """The sheet template (the built-in one, or a file), parsed once per process."""
+    if path is None:
+        return Template(SHEET_TEMPLATE)
+    with open(path, encoding="utf-8") as f:
+        return Template(f.read())
+
+
+def render_html_sheet(data, template_path=None):
+    """One sheet as an HTML fragment; wrap with render_html_page for a full document."""
+    e = html.escape
+    bars = "".join(
+        f'<tr><td>{e(pool)}</td><td>{value} / {maximum}</td><td><div class="bar"><div class="fill" '
+        f'style="width:{100 * value // maximum if maximum else 0}%"></div></div></td></tr>'
+        for pool, value, maximum in data["bars"])
+    features = "".join(
+        f'<div class="feature"><h3>{e(name)} <span class="bonus">'
+        f'{"+1 " + e(stat) if stat != "None" else "No stat increase"}</span></h3><p>{e(description)}</p></div>'
+        for name, stat, description in data["features"])
+    return compile_template(template_path).safe_substitute(
+        name=e(data["name"]),
+        stat_headers="".join(f"<th>{e(stat)}</th>" for stat, value in data["stats"]),
+        stat_values="".join(f"<td>{value}</td>" for stat, value in data["stats"]),
+        bars=bars,
+        languages=e(", ".join(data["languages"])) or "None",
+        features=features or "<p>None</p>",
+    )
+
+
+def render_html_page(fragments, title):
+    return Template(PAGE_TEMPLATE).safe_substitute(title=html.escape(title), sheets="\n".join(fragments))
+
+
+# --- PDF ---
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842   # A4 in points
+MARGIN = 50
+# Average Helvetica glyph width as a fraction of the font size, for line wrapping
+AVERAGE_GLYPH_WIDTH = 0.5
+
+
+def wrap(text, size, width=PAGE_WIDTH - 2 * MARGIN):
+    """Splits text into lines that fit `width` at font `size`, keeping paragraph breaks."""
+    per_line = max(10, int(width / (size * AVERAGE_GLYPH_WIDTH)))
+    lines = []
+    for paragraph in text.splitlines() or [""]:
+        line = ""
+        for word in paragraph.split():
+            if line and len(line) + 1 + len(word) > per_line:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.append(line)
+    return lines
+
+
+def layout_pdf_sheet(data):
+    """Lays a sheet out as pages of (font, size, x, y, text) runs."""
+    pages = [[]]
+    y = PAGE_HEIGHT - MARGIN
+
+    def write(text, font="F1", size=10, indent=0, gap=4):
+        nonlocal y
+        for line in wrap(text, size, PAGE_WIDTH - 2 * MARGIN - indent):
+            if y - size < MARGIN:
+                pages.append([])
+                y = PAGE_HEIGHT - MARGIN
+            y -= size + 2
+            pages[-1].append((font, size, MARGIN + indent, y, line))
+        y -= gap
+
+    write(data["name"], "F2", 20, gap=10)
+    write("   ".join(f"{stat} {value}" for stat, value in data["stats"]), "F2", 12, gap=10)
+    write("Derived", "F2", 13)
+    for pool, value, maximum in data["bars"]:
+        write(f"{pool}: {value} / {maximum}", indent=10, gap=1)
+    y -= 8
+    write("Languages", "F2", 13)
+    write(", ".join(data["languages"]) or "None", indent=10, gap=10)
+    write("Features", "F2", 13)
+    for name, stat, description in data["features"]:
+        write(f"{name} ({'+1 ' + stat if stat != 'None' else 'no stat increase'})", "F2", 11, gap=2)
+        write(description, indent=10, gap=8)
+    return pages
+
+
+def _pdf_text(text):
+    # WinAnsiEncoding is cp1252, which also covers curly quotes and dashes
+    encoded = text.encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def write_pdf(path, pages):
+    """Writes pages of (font, size, x, y, text) runs as a PDF with Helvetica and Helvetica-Bold."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,   # the page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+    for runs in pages:
+        stream = b"".join(b"BT /%s %d Tf %d %d Td (%s) Tj ET\n" % (font.encode(), size, x, y, _pdf_text(text))
+                          for font, size, x, y, text in runs)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>"
+                       % (PAGE_WIDTH, PAGE_HEIGHT, len(objects)))
+        page_ids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(output)
+
+
+# --- Export ---
+
+def export_character(character, path, template_path=None):
+    """Writes one sheet; the format follows the file extension (.html or .pdf)."""
+    data = sheet_data(character)
+    if path.lower().endswith(".pdf"):
+        write_pdf(path, layout_pdf_sheet(data))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_html_page([render_html_sheet(data, template_path)], data["name"]))
+
+
+def sheet_filename(index, name, fmt):
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", name).strip("-") or "unnamed"
+    return f"{index + 1:03d}-{slug}.{fmt}"
+
+
+# Each worker process keeps its own compendium (and roster store, if any), opened once by _init_worker
+_worker_compendium = None
+_worker_store = None
+
+
+def _init_worker(compendium_path, template_path, store_handle=None):
+    global _worker_compendium, _worker_store
+    _worker_compendium = open_compendium(compendium_path)
+    if store_handle is not None:
+        from roster_store import RosterStore
+        _worker_store = RosterStore.attach(store_handle)
+    compile_template(template_path)
+
+
+def _render(job):
+    """Worker: (index, record or store row, fmt, out_dir or None, template) -> path written, or the rendered sheet."""
+    index, source, fmt, out_dir, template_path = job
+    record = _worker_store.record(source) if _worker_store is not None else source
+    character = character_from_record(record, _worker_compendium)
+    data = sheet_data(character)
+    rendered = layout_pdf_sheet(data) if fmt == "pdf" else render_html_sheet(data, template_path)
+    if out_dir is None:
+        return rendered
+    path = os.path.join(out_dir, sheet_filename(index, data["name"], fmt))
+    if fmt == "pdf":
+        write_pdf(path, rendered)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_html_page([rendered], data["name"]))
+    return path
+
+
+def export_characters(characters, compendium, out_dir, fmt="html", combined=False, template_path=None,
+                      workers=None):
+    """Exports characters into out_dir across a process pool. Returns the paths written.
+
+    Characters travel to the workers as compact save records; the workers
+    rebuild them against their own copy of the compendium.
+    """
+    records = [character_to_record(character, compendium) for character in characters]
+    return _export(records, compendium, None, out_dir, fmt, combined, template_path, workers)
+
+
+def export_store(store, compendium, out_dir, fmt="html", combined=False, template_path=None, workers=None,
+                 rows=None):
+    """Exports rows of a RosterStore (all by default). Only row numbers are sent; workers attach to the store."""
+    rows = range(len(store)) if rows is None else rows
+    return _export(list(rows), compendium, store.handle(), out_dir, fmt, combined, template_path, workers)
+
+
+def _export(sources, compendium, store_handle, out_dir, fmt, combined, template_path, workers):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'.")
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(index, source, fmt, None if combined else out_dir, template_path) for index, source in enumerate(sources)]
+    if not jobs:
+        return []
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(compendium.path, template_path, store_handle)) as pool:
+        results = list(pool.map(_render, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+    if not combined:
+        return results
+    path = os.path.join(out_dir, f"roster.{fmt}")
+    if fmt == "pdf":
+        write_pdf(path, [page for pages in results for page in pages])
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_html_page(results, "Roster"))
+    return [path]
+
+
+if __name__ == "__main__":
+    from compendium import default_compendium_path
+
+    parser = argparse.ArgumentParser(description="Export character sheets to HTML or PDF.")
+    parser.add_argument("roster", help="A character or roster file (.jsonl)")
+    parser.add_argument("output_dir")
+    parser.add_argument("--format", choices=FORMATS, default="html")
+    parser.add_argument("--combined", action="store_true", help="One printable file with a sheet per page")
+    parser.add_argument("--template", help="HTML sheet template using $name, $stat_headers, $stat_values, "
+                                           "$bars, $languages and $features")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--compendium", default=default_compendium_path())
+    args = parser.parse_args()
+
+    compendium = open_compendium(args.compendium)
+    errors = []
+    characters = list(iter_roster(args.roster, compendium, errors))
+    for line_number, message in errors:
+        print(f"Skipped line {line_number}: {message}")
+    paths = export_characters(characters, compendium, args.output_dir, args.format, args.combined,
+                              args.template, args.jobs)
+    print(f"Exported {len(characters)} characters to {len(paths)} files in {args.output_dir}")
@@ -1,61 +1,82 @@
+import time
+
+# Taken before anything else is imported, so the startup timer covers imports too
+LAUNCH_TIME = time.perf_counter()
+
+import argparse
+import os
+import sys
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+
+from character_engine import DERIVED_GRAPH, STATS, Allocation, Character, DuplicateFeatureError, RuleError, close_compendium, open_compendium
+from character_io import iter_roster, load_character, save_character, save_roster
+from compendium import default_compendium_path
+from feature_search import FeatureSearchIndex
+from journal import Journal
+from profiling import Profiler
+from ui_scheduler import RefreshScheduler
+from virtual_list import VirtualFeatureList
+
+IMPORTS_DONE_TIME = time.perf_counter()
+
+# Feature picker type-ahead: wait this long after the last keystroke, then show this many matches
+SEARCH_DEBOUNCE_MS = 150
+SEARCH_RESULT_LIMIT = 25
+
+SAVE_FILETYPES = [("Flutter characters", "*.jsonl"), ("All files", "*.*")]
+COMPENDIUM_FILETYPES = [("Compendiums", "*.cmp"), ("All files", "*.*")]
+EXPORT_FILETYPES = [("Web page", "*.html"), ("PDF", "*.pdf")]
+
+# Every change is journaled here so a crash loses nothing; see journal.py
+AUTOSAVE_FILE = os.path.join(os.path.expanduser("~"), ".flutter_autosave.jsonl")
+
+# Window icon: icon.ico on Windows, the PNG variants from convert_to_ico.py everywhere else
+ICON_FILE = "icon.ico"
+ICON_PNG_DIR = "icons"
+ICON_PNG_SIZES = (16, 32, 48, 64, 128, 256)
+
+# Handlers timed by --profile
+PROFILED_HANDLERS = ("modify_stat", "_add_feature_logic", "remove_feature", "update_displayed_stats",
+                     "create_language_entries", "flush_refresh")
 
 class CharacterCreator(tk.Tk):
-    def __init__(self):
+    def __init__(self, compendium_path=None, startup_timer=False, profiler=None, autosave_path=None,
+                 sync_connect=None):
         super().__init__()
+        # Opt-in instrumentation; without a profiler nothing is wrapped
+        if profiler is not None:
+            profiler.instrument(self, PROFILED_HANDLERS)
         self.title("Flutter Character Creator")
         self.geometry("450x450")
         self.resizable(True, True) # Allow resizing
         self.configure(bg="#1e1e1e")
-        # Attempting to change the icon
-        try:
-            self.iconbitmap('icon.ico')
-        except tk.TclError:
-            print("Warning: Could not load 'icon.ico'. Make sure the file exists and is a valid .ico file.")
-            # Fallback for other OS or if .ico isn't preferred
-            # You might try:
-            # self.iconphoto(True, tk.PhotoImage(file='icon.png'))
-            # self.photo_icon = tk.PhotoImage(file='icon.png') # Keep a reference to prevent garbage collection
-            # self.iconphoto(True, self.photo_icon)
+        self.set_window_icon()
 
         # --- Predefined Features Data ---
-        self.PREDEFINED_FEATURES = {
-            "Veteran": {
-                "stat_increase": ["Might", "Agility"],
-                "description": "A veteran has seen combat before, and has the scars and knowledge of a life led in combat. Veterans come from diverse backgrounds, from bandits to town guards to once renowned heroes who have now faded into obscurity. No matter the source, veterans are proficient combat specialists.\n\n- Every attack deals an additional damage.\n- Survey Action: 1 Round, choose a creature, you learn the value of one statistic of your choosing, a random weakness or resistance, or the information of one action you have seen them perform.\n- Block Action: X Stamina, choosing an amount of stamina to expend, you gain temporary health equal to the stamina expended. This block goes away at the end of your next turn."
-            },
-            "Knave": {
-                "stat_increase": "Agility",
-                "description": "A Knave is a trickster, who often makes their life’s earnings swindling people and can be found in all walks of life. From the humble street pick-pocket to a crook whispering in a king's ear. Knaves are remarkably skilled in quiet movement, theft, and avoiding the victims of their exploits. Knaves are not necessarily evil, but are looked down on by more honest folk.\n\n- When attacking an opponent who is unaware of your presence, or who you’re flanking, deal double damage.\n- Annoy Action: 1 Round, choose a creature, you distract them with loud noises, pocket sand, or other distracting stimulus. Force the creature to turn towards you until the start of your next turn.\n- Hide Action: X Stamina, hide from those around, any creature with Mind lower than the stamina you expended to hide cannot target you with any action. This lasts until the start of your next turn. Any action that would affect another creature alerts them to your position removes the benefit of this action until you attempt to hide again."
-            },
-            "Scholar": {
-                "stat_increase": "Mind",
-                "description": "Scholars are almost always found in high society. Clustered to the ultra wealthy, these people come from nobility and have been given the privilege of a life surrounded by books, scrolls, and academia. Some scholars flee into the wilderness to research without supervision, and occasionally accept pupils from smaller villages, but the surroundings eventually degrade the quality of the research done, and lead more interested youth to pursue a life of a scribe to higher born people.\n\n- You gain a new derived stat, Mana. Mana is calculated by 3*Mind. Mana is restored during daily preparations.\n- Sparks: 1 Stamina X Mana, choose a creature within 15 spaces, they take X magic damage.\n- Research Action: 1 Workday, 100-Mind % chance to discover a new piece of lore related to what you are researching. Requires access to a library or populated town.",
-                "special": {"derived_stat": "Mana"}
-            },
-            "Charlatan": {
-                "stat_increase": "Will",
-                "description": "Charlatans are similar to knaves, except they invest more in the mind over the body of theft. Charlatans will often be seen as loan sharks, gang leaders, or cheats. However, Charlatans are most successful in the open as diplomats. Tricky contracts and deals have bankrupted more kingdoms and ruined more lives than even the most influential cheat. Mind games and battles of will are a Charlatans bread and butter, and they naturally gravitate towards leading those with lower wills.\n\n- Your grit restores at the beginning of every round.\n- Belittle Action: 2 Stamina X Grit, choose a creature within range. If the creature can understand a language you speak, you shout harassments at it. Reduce their Grit by X. Once a creature has zero grit, this attack lowers the target’s will by half of X, while they are reduced to zero will, the creature obeys your commands and ignores other creature’s commands or pleas.\n- Inspire Action: 2 Stamina X Grit, choose a creature within range, restore the creature’s Grit. Any Grit exceeding their maximum is kept as temporary Grit."
-            },
-            "Wanderer": {
-                "stat_increase": ["Might", "Agility", "Mind", "Will"],
-                "description": "Wanderers have shirked the burdens of society and left to indulge in their own whims and wiles. Wanderers come from all walks of life, though tragedy of some form seems to hang over near all of them. It is said that any soul who lacks a place in the world finds a family in the groups of others who have left the world behind. A special language that transcends boundaries of land or life is known by all, and is said to be the root of most other languages, based on how quickly everyone seems to pick it up.\n\n- You learn the language “Primordial” and can leave hidden messages with it, only noticeable to others who know this language.\n- Aid Action: 1 Round, restore a value equal to your Will to a number of creatures equal to your Mind within 15 spaces to any derived stat of your choosing.\n- Steal Action: X Stamina, choose a creature within 5 spaces of you and a base stat. The target’s base stat is reduced and your base stat is improved by half of X. The target's base stat can not be reduced below 1. This effect lasts until the beginning of your next turn.",
-                "special": {"language": "Primordial"}
-            }
-        }
+        # Opened on first use (the stat block, loading a file) rather than before the
+        # first window. Only the index is read then; descriptions are loaded on demand.
+        self.compendium_path = compendium_path or default_compendium_path()
+        self._compendium = None
+        self._feature_search = None
+        self.feature_search_job = None
+
+        # Languages granted by special rules; their entries are read-only
+        self.special_languages = set()
 
         # --- Core Character Variables ---
-        self.total_points = 8
-        self.base_stats = {"Might": 1, "Agility": 1, "Mind": 1, "Will": 1}
-        self.current_points = self.total_points
+        # The rules live in character_engine; this window only displays and edits them.
+        self.allocation = Allocation()
+        self.character = Character(self.allocation.stats)
+        # Every open character; they all share self.compendium and one set of stat-block widgets
+        self.roster = []
         self.stat_vars = {}
         self.frames = {}
         self.player_name = tk.StringVar()
-        self.features = []
         self.stat_display_labels = {}
         self.language_entries = []
         self.language_label = None
+        self.shown_language_slots = None
 
         # --- Derived stat variables ---
         self.health_max_var = tk.IntVar()
@@ -64,25 +85,127 @@ class CharacterCreator(tk.Tk):
         self.stamina_current = tk.IntVar()
         self.grit_max_var = tk.IntVar()
         self.grit_current = tk.IntVar()
+        # Every bar on screen: pool name -> (current var, max var, progress bar)
+        self.pool_bars = {}
+        # Last computed derived values for the bound character, updated per dependency
+        self.derived_values = {}
+        # Handlers mark what changed; the screen is redrawn once per idle cycle or batch
+        self.refresh = RefreshScheduler(self, self.flush_refresh)
 
         # --- Style Configuration ---
+        # Only what the allocation screen uses; the stat block adds its styles when first built
         self.style = ttk.Style(self)
         self.style.theme_use("default")
         self.style.configure("TFrame", background="#1e1e1e")
-        self.style.configure("Health.Horizontal.TProgressbar", troughcolor="#444444", background="#e63946", thickness=20)
-        self.style.configure("Stamina.Horizontal.TProgressbar", troughcolor="#444444", background="#4cc9f0", thickness=20)
-        self.style.configure("Grit.Horizontal.TProgressbar", troughcolor="#444444", background="#ffbe0b", thickness=20)
-        self.style.configure("Mana.Horizontal.TProgressbar", troughcolor="#444444", background="#9a48d6", thickness=20)
         self.style.configure("TLabel", foreground="white", background="#1e1e1e", font=("Segoe UI", 10))
         self.style.configure("Header.TLabel", font=("Segoe UI", 16, "bold"), foreground="white", background="#1e1e1e")
-        self.style.configure("SubHeader.TLabel", font=("Segoe UI", 12, "bold", "underline"), foreground="white", background="#1e1e1e")
         self.style.configure("Stat.TLabel", font=("Segoe UI", 12, "bold"), foreground="white", background="#1e1e1e")
         self.style.configure("TButton", font=("Segoe UI", 10))
-        self.style.configure("TCombobox", font=("Segoe UI", 10))
-        self.style.configure("TMenubutton", font=("Segoe UI", 10))
+
+        # --- Menu ---
+        menubar = tk.Menu(self)
+        file_menu = tk.Menu(menubar, tearoff=0)
+        file_menu.add_command(label="Save Character...", command=self.save_to_file)
+        file_menu.add_command(label="Load Character...", command=self.load_from_file)
+        file_menu.add_separator()
+        file_menu.add_command(label="New Character", command=self.new_character)
+        file_menu.add_command(label="Import Roster...", command=self.import_roster)
+        file_menu.add_command(label="Save Roster...", command=self.save_roster_to_file)
+        file_menu.add_separator()
+        file_menu.add_command(label="Open Compendium...", command=self.open_compendium_file)
+        file_menu.add_separator()
+        file_menu.add_command(label="Export Sheet...", command=self.export_sheet)
+        file_menu.add_command(label="Export Roster Sheets...", command=self.export_roster_sheets)
+        menubar.add_cascade(label="File", menu=file_menu)
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        edit_menu.add_command(label="Undo", accelerator="Ctrl+Z", command=self.undo)
+        edit_menu.add_command(label="Redo", accelerator="Ctrl+Y", command=self.redo)
+        menubar.add_cascade(label="Edit", menu=edit_menu)
+        self.config(menu=menubar)
+        # Caps Lock turns Ctrl+Z into <Control-Z>, so only an explicit Shift means redo
+        self.bind("<Control-z>", lambda event: self.undo())
+        self.bind("<Control-Z>", lambda event: self.undo())
+        self.bind("<Control-y>", lambda event: self.redo())
+        self.bind("<Control-Y>", lambda event: self.redo())
+        self.bind("<Control-Shift-Z>", lambda event: self.redo())
+        self.bind("<Control-Shift-z>", lambda event: self.redo())
 
         self.show_stat_allocation_screen()
 
+        # --- Autosave ---
+        # Opened once the first window is up, since restoring a session needs the compendium
+        self.autosave_path = autosave_path
+        self.journal = None
+        if autosave_path:
+            self.after_idle(self.start_autosave)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # --- Live sync ---
+        # The shown character is published to the GM's session server (see live_sync.py);
+        # deltas are coalesced with after() and sent from a network thread
+        # live_sync (and asyncio with it) is only imported when syncing, to keep startup fast
+        self.publisher = None
+        if sync_connect:
+            from live_sync import SheetPublisher
+            self.publisher = SheetPublisher(sync_connect, schedule=self.after)
+
+        # --- Startup timer ---
+        if startup_timer:
+            self.window_built_time = time.perf_counter()
+            self.startup_timer_binding = self.bind("<Map>", self.report_startup_time)
+
+    def report_startup_time(self, event):
+        """Reports time from launch to the first drawn window, once."""
+        if event.widget is not self:
+            return
+        self.unbind("<Map>", self.startup_timer_binding)
+        self.update_idletasks()
+        ms = lambda start, end: round((end - start) * 1000)
+        now = time.perf_counter()
+        report = (f"First window after {ms(LAUNCH_TIME, now)} ms "
+                  f"(imports {ms(LAUNCH_TIME, IMPORTS_DONE_TIME)} ms, "
+                  f"building the window {ms(IMPORTS_DONE_TIME, self.window_built_time)} ms, "
+                  f"drawing it {ms(self.window_built_time, now)} ms)")
+        # Windowed builds have no console, so the result also goes in the title bar
+        if sys.stdout is not None:
+            print(report)
+        self.title(f"Flutter Character Creator - {report}")
+
+    # --- Lazily built data ---
+    @property
+    def compendium(self):
+        if self._compendium is None:
+            self._compendium = open_compendium(self.compendium_path)
+            self.refresh_special_languages()
+            # Homebrew stats granted under a previous compendium may no longer exist
+            characters = self.roster if self.character in self.roster else self.roster + [self.character]
+            for character in characters:
+                for name in [name for name in character.extra_derived if name not in DERIVED_GRAPH.nodes]:
+                    del character.extra_derived[name]
+            if self.journal:
+                self.journal.compendium = self._compendium
+        return self._compendium
+
+    @property
+    def feature_search(self):
+        if self._feature_search is None:
+            self._feature_search = FeatureSearchIndex(self.compendium)
+        return self._feature_search
+
+    def set_window_icon(self):
+        """iconbitmap only reads .ico files on Windows; other platforms need iconphoto."""
+        base_dir = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+        try:
+            if sys.platform == "win32":
+                self.iconbitmap(os.path.join(base_dir, ICON_FILE))
+            else:
+                # Keep references to the images, or Tk drops them
+                self.icon_images = [tk.PhotoImage(file=os.path.join(base_dir, ICON_PNG_DIR, f"icon_{size}.png"))
+                                    for size in ICON_PNG_SIZES]
+                self.iconphoto(True, *self.icon_images)
+        except tk.TclError:
+            print("Warning: Could not load the window icon. Run convert_to_ico.py to build icon.ico and icons/.")
+
     def show_stat_allocation_screen(self):
         self.geometry("450x450")
         frame = ttk.Frame(self, padding=20, style="TFrame")
@@ -90,41 +213,53 @@ class CharacterCreator(tk.Tk):
         self.frames["stat_alloc"] = frame
 
         ttk.Label(frame, text="Allocate Your Stats", style="Header.TLabel").pack(pady=10)
-        self.point_label = ttk.Label(frame, text=f"Points Left: {self.current_points}", style="Stat.TLabel")
+        self.point_label = ttk.Label(frame, text=f"Points Left: {self.allocation.points_left}", style="Stat.TLabel")
         self.point_label.pack(pady=5)
 
-        for stat in self.base_stats:
+        for stat in STATS:
             row = ttk.Frame(frame, style="TFrame")
             row.pack(pady=6, fill="x")
             ttk.Label(row, text=f"{stat}:", style="Stat.TLabel", width=12).pack(side="left")
             ttk.Button(row, text="-", width=3, command=lambda s=stat: self.modify_stat(s, -1)).pack(side="left", padx=(0, 5))
-            self.stat_vars[stat] = tk.IntVar(value=self.base_stats[stat])
+            self.stat_vars[stat] = tk.IntVar(value=self.allocation.stats[stat])
             ttk.Label(row, textvariable=self.stat_vars[stat], style="Stat.TLabel", width=3, anchor="center").pack(side="left")
             ttk.Button(row, text="+", width=3, command=lambda s=stat: self.modify_stat(s, 1)).pack(side="left", padx=(5, 0))
 
         ttk.Button(frame, text="Confirm", command=self.confirm_stats).pack(pady=20)
+        if self.roster:
+            ttk.Button(frame, text="Cancel", command=self.cancel_new_character).pack()
 
     def modify_stat(self, stat, delta):
-        current = self.stat_vars[stat].get()
-        if delta == 1 and self.current_points > 0:
-            self.stat_vars[stat].set(current + 1)
-            self.current_points -= 1
-        elif delta == -1 and current > 1:
-            self.stat_vars[stat].set(current - 1)
-            self.current_points += 1
-        self.point_label.config(text=f"Points Left: {self.current_points}")
+        if self.allocation.modify(stat, delta):
+            self.refresh.mark("allocation", stat)
+            if self.journal:
+                self.journal.allocation_changed(self.allocation.stats[s] for s in STATS)
 
     def confirm_stats(self):
-        if self.current_points > 0:
-            messagebox.showwarning("Unspent Points", "Please allocate all stat points before proceeding.")
+        try:
+            self.character = self.allocation.confirm()
+        except RuleError as e:
+            messagebox.showwarning("Unspent Points", str(e))
             return
-        for stat in self.base_stats:
-            self.base_stats[stat] = self.stat_vars[stat].get()
-        self.frames["stat_alloc"].destroy()
-        self.show_stat_block_screen()
+        self.frames.pop("stat_alloc").destroy()
+        self.roster.append(self.character)
+        if self.journal:
+            self.journal.track(self.character)
+            self.journal.allocation_changed(None)
+        if "stat_block" in self.frames:
+            self.return_to_stat_block()
+        else:
+            self.show_stat_block_screen()
 
     def show_stat_block_screen(self):
-        self.geometry("1100x800")
+        self.geometry("1300x800")
+        self.style.configure("Health.Horizontal.TProgressbar", troughcolor="#444444", background="#e63946", thickness=20)
+        self.style.configure("Stamina.Horizontal.TProgressbar", troughcolor="#444444", background="#4cc9f0", thickness=20)
+        self.style.configure("Grit.Horizontal.TProgressbar", troughcolor="#444444", background="#ffbe0b", thickness=20)
+        self.style.configure("Mana.Horizontal.TProgressbar", troughcolor="#444444", background="#9a48d6", thickness=20)
+        self.style.configure("SubHeader.TLabel", font=("Segoe UI", 12, "bold", "underline"), foreground="white", background="#1e1e1e")
+        self.style.configure("TCombobox", font=("Segoe UI", 10))
+        self.style.configure("TMenubutton", font=("Segoe UI", 10))
         # This top-level frame is packed into the main window, which is fine.
         frame = ttk.Frame(self, padding=20, style="TFrame")
         frame.pack(fill="both", expand=True)
@@ -132,15 +267,21 @@ class CharacterCreator(tk.Tk):
 
         # --- Configure the grid layout for the 'frame' widget ---
         # This frame will use grid to manage its children (left_frame and right_frame).
-        frame.grid_columnconfigure(1, weight=1)  # Make the right column (features) expand
+        frame.grid_columnconfigure(2, weight=1)  # Make the right column (features) expand
         frame.grid_rowconfigure(0, weight=1)     # Make the row expand vertically
 
         # --- Create and place child frames using ONLY .grid() ---
+        roster_frame = ttk.Frame(frame, style="TFrame")
+        roster_frame.grid(row=0, column=0, sticky="ns", padx=(0, 20))  # Use .grid(), NOT .pack()
+
         left_frame = ttk.Frame(frame, style="TFrame")
-        left_frame.grid(row=0, column=0, sticky="ns", padx=(0, 20))  # Use .grid(), NOT .pack()
+        left_frame.grid(row=0, column=1, sticky="ns", padx=(0, 20))  # Use .grid(), NOT .pack()
 
         right_frame = ttk.Frame(frame, style="TFrame")
-        right_frame.grid(row=0, column=1, sticky="nsew") # Use .grid(), NOT .pack()
+        right_frame.grid(row=0, column=2, sticky="nsew") # Use .grid(), NOT .pack()
+
+        # --- ROSTER: open characters ---
+        self.setup_roster_panel(roster_frame)
 
         # --- LEFT SIDE: Stats and Bars ---
         self.setup_left_panel(left_frame)
@@ -148,6 +289,80 @@ class CharacterCreator(tk.Tk):
         # --- RIGHT SIDE: Features panel ---
         self.setup_right_panel(right_frame)
 
+        self.bind_character(self.character)
+        self.refresh_roster_list()
+
+    def setup_roster_panel(self, parent_frame):
+        ttk.Label(parent_frame, text="Roster", style="SubHeader.TLabel").pack(anchor="w", pady=(10, 5))
+        self.roster_list = tk.Listbox(parent_frame, width=20, exportselection=False, activestyle="none",
+                                      bg="#2b2b2b", fg="white", selectbackground="#4cc9f0", highlightthickness=0)
+        self.roster_list.pack(fill="y", expand=True)
+        self.roster_list.bind("<<ListboxSelect>>", self.on_roster_select)
+        ttk.Button(parent_frame, text="New Character", command=self.new_character).pack(fill="x", pady=(10, 0))
+        # Keep the selected roster row's label in step with the name being typed
+        self.player_name.trace_add("write", lambda *args: self.refresh_roster_row())
+        self.player_name.trace_add("write", lambda *args: self.publish_sheet())
+
+    def roster_label(self, character):
+        return character.name or "Unnamed"
+
+    def refresh_roster_list(self):
+        self.roster_list.delete(0, tk.END)
+        self.roster_list.insert(tk.END, *(self.roster_label(c) for c in self.roster))
+        self.select_roster_row()
+
+    def refresh_roster_row(self):
+        if self.character not in self.roster:
+            return
+        index = self.roster.index(self.character)
+        label = self.player_name.get() or "Unnamed"
+        if self.roster_list.get(index) != label:
+            self.roster_list.delete(index)
+            self.roster_list.insert(index, label)
+            self.select_roster_row()
+
+    def select_roster_row(self):
+        self.roster_list.selection_clear(0, tk.END)
+        if self.character in self.roster:
+            index = self.roster.index(self.character)
+            self.roster_list.selection_set(index)
+            self.roster_list.see(index)
+
+    def on_roster_select(self, event=None):
+        selection = self.roster_list.curselection()
+        if selection:
+            self.switch_character(self.roster[selection[0]])
+
+    def switch_character(self, character):
+        """Rebinds the stat-block widgets to another roster character; nothing is rebuilt."""
+        if character is self.character:
+            return
+        self.collect_character_state()
+        self.bind_character(character)
+        self.select_roster_row()
+
+    def new_character(self):
+        """Hides the stat block (without destroying it) and allocates stats for a new character."""
+        if "stat_alloc" in self.frames:
+            return
+        if "stat_block" in self.frames:
+            self.collect_character_state()
+            self.frames["stat_block"].pack_forget()
+        self.allocation = Allocation()
+        self.show_stat_allocation_screen()
+
+    def cancel_new_character(self):
+        self.frames.pop("stat_alloc").destroy()
+        if self.journal:
+            self.journal.allocation_changed(None)
+        self.return_to_stat_block()
+
+    def return_to_stat_block(self):
+        self.geometry("1300x800")
+        self.frames["stat_block"].pack(fill="both", expand=True)
+        self.bind_character(self.character)
+        self.refresh_roster_list()
+
     def setup_left_panel(self, parent_frame):
         player_name_frame = ttk.Frame(parent_frame, style="TFrame")
         player_name_frame.pack(pady=10, fill="x")
@@ -155,33 +370,29 @@ class CharacterCreator(tk.Tk):
         self.player_name_entry = ttk.Entry(player_name_frame, textvariable=self.player_name, font=("Segoe UI", 12))
         self.player_name_entry.pack(side="left", fill="x", expand=True)
 
-        for stat in self.base_stats:
+        stats = self.character.stats
+        for stat in STATS:
             row = ttk.Frame(parent_frame, style="TFrame")
             row.pack(fill="x", pady=2)
             ttk.Label(row, text=f"{stat}:", style="Stat.TLabel", width=12).pack(side="left")
-            stat_label = ttk.Label(row, text=str(self.base_stats[stat]), style="Stat.TLabel")
+            stat_label = ttk.Label(row, text=str(stats[stat]), style="Stat.TLabel")
             stat_label.pack(side="left")
             self.stat_display_labels[stat] = stat_label
 
-        self.health_max_var.set(self.base_stats["Might"] * 3)
-        self.health_current.set(self.health_max_var.get())
-        self.stamina_max_var.set(self.base_stats["Agility"])
-        self.stamina_current.set(self.stamina_max_var.get())
-        self.grit_max_var.set(self.base_stats["Will"] * 2)
-        self.grit_current.set(self.grit_max_var.get())
-
         self.bars_frame = ttk.Frame(parent_frame, style="TFrame")
         self.bars_frame.pack(fill="x", pady=8)
         self.health_progress_bar = self.add_bar(self.bars_frame, "Health", self.health_current, self.health_max_var, "Health.Horizontal.TProgressbar")
         self.stamina_progress_bar = self.add_bar(self.bars_frame, "Stamina", self.stamina_current, self.stamina_max_var, "Stamina.Horizontal.TProgressbar")
         self.grit_progress_bar = self.add_bar(self.bars_frame, "Grit", self.grit_current, self.grit_max_var, "Grit.Horizontal.TProgressbar")
+        self.pool_bars["Health"] = (self.health_current, self.health_max_var, self.health_progress_bar)
+        self.pool_bars["Stamina"] = (self.stamina_current, self.stamina_max_var, self.stamina_progress_bar)
+        self.pool_bars["Grit"] = (self.grit_current, self.grit_max_var, self.grit_progress_bar)
 
-        self.language_label = ttk.Label(parent_frame, text=f"\nLanguages (up to {1 + (self.base_stats['Mind'] - 1) // 3}):", style="Stat.TLabel")
+        self.language_label = ttk.Label(parent_frame, text=f"\nLanguages (up to {self.character.language_slots}):", style="Stat.TLabel")
         self.language_label.pack(pady=(15, 5))
         self.language_entries_frame = ttk.Frame(parent_frame, style="TFrame")
         self.language_entries_frame.pack(fill="x")
-        self.create_language_entries()
-        
+
         # Language Override Section
         override_lang_frame = ttk.Frame(parent_frame)
         override_lang_frame.pack(fill="x", pady=(10, 5))
@@ -198,11 +409,27 @@ class CharacterCreator(tk.Tk):
         progress = ttk.Progressbar(bar_frame, style=style_name, maximum=max_var.get(), variable=current_var, length=200)
         progress.pack(side="left", padx=5)
         ttk.Label(bar_frame, textvariable=current_var, style="Stat.TLabel", width=4, anchor="center").pack(side="left")
-        ttk.Button(bar_frame, text="-", width=2, command=lambda: current_var.set(max(current_var.get() - 1, 0))).pack(side="left", padx=2)
-        ttk.Button(bar_frame, text="+", width=2, command=lambda: current_var.set(min(current_var.get() + 1, max_var.get()))).pack(side="left", padx=2)
-        ttk.Button(bar_frame, text="Reset", command=lambda: current_var.set(max_var.get())).pack(side="left", padx=2)
+        ttk.Button(bar_frame, text="-", width=2, command=lambda: self.change_pool(label, -1)).pack(side="left", padx=2)
+        ttk.Button(bar_frame, text="+", width=2, command=lambda: self.change_pool(label, 1)).pack(side="left", padx=2)
+        ttk.Button(bar_frame, text="Reset", command=lambda: self.reset_pool(label)).pack(side="left", padx=2)
         return progress
 
+    def change_pool(self, name, delta):
+        """Bar +/- buttons: update the character, and let the next refresh move the bar."""
+        maximum = self.derived_values[name]
+        old = self.character.pools.get(name, maximum)
+        self.character.pools[name] = max(0, min(old + delta, maximum))
+        self.refresh.mark("pools", name)
+        if self.journal:
+            self.journal.pool_changed(self.character, name, old, self.character.pools[name])
+
+    def reset_pool(self, name):
+        old = self.character.pools.get(name)
+        self.character.pools[name] = self.derived_values[name]
+        self.refresh.mark("pools", name)
+        if self.journal:
+            self.journal.pool_changed(self.character, name, old, self.character.pools[name])
+
     def setup_right_panel(self, parent_frame):
         # --- Predefined Features ---
         ttk.Label(parent_frame, text="Add Predefined Feature", style="SubHeader.TLabel").grid(row=0, column=0, sticky="w", pady=(10,5), columnspan=2)
@@ -210,9 +437,12 @@ class CharacterCreator(tk.Tk):
         predefined_frame = ttk.Frame(parent_frame, style="TFrame")
         predefined_frame.grid(row=1, column=0, sticky="ew", columnspan=2)
         
-        self.feature_combobox = ttk.Combobox(predefined_frame, values=list(self.PREDEFINED_FEATURES.keys()), state="readonly", width=30)
+        # Editable so it doubles as a search box; the dropdown lists only the best matches
+        self.feature_combobox = ttk.Combobox(predefined_frame, values=self.feature_search.search("", limit=SEARCH_RESULT_LIMIT), width=30)
         self.feature_combobox.pack(side="left", padx=(0,10))
         self.feature_combobox.bind("<<ComboboxSelected>>", self.populate_feature_fields)
+        self.feature_combobox.bind("<KeyRelease>", self.on_feature_search_key)
+        self.feature_combobox.bind("<Return>", self.choose_top_feature_match)
 
         self.predefined_stat_var = tk.StringVar()
         self.predefined_stat_menu = ttk.OptionMenu(predefined_frame, self.predefined_stat_var, "")
@@ -250,12 +480,13 @@ class CharacterCreator(tk.Tk):
         list_header_frame = ttk.Frame(parent_frame, style="TFrame")
         list_header_frame.grid(row=6, column=0, sticky="ew", columnspan=2)
         ttk.Label(list_header_frame, text="Added Features", style="SubHeader.TLabel").pack(side="left", pady=5)
-        
-        self.feature_tree = ttk.Treeview(parent_frame, columns=("Feature", "Bonus"), show="headings")
-        self.feature_tree.heading("Feature", text="Feature Name")
-        self.feature_tree.heading("Bonus", text="Stat Bonus")
-        self.feature_tree.column("Feature", width=250)
-        self.feature_tree.column("Bonus", width=100, anchor="center")
+        self.feature_filter_var = tk.StringVar()
+        self.feature_filter_var.trace_add("write", lambda *args: self.feature_tree.set_filter(self.feature_filter_var.get()))
+        ttk.Entry(list_header_frame, textvariable=self.feature_filter_var, width=20).pack(side="right", pady=5)
+        ttk.Label(list_header_frame, text="Filter:", style="TLabel").pack(side="right", padx=5)
+
+        # Only the visible rows exist as Treeview items; sorting and filtering happen in the model
+        self.feature_tree = VirtualFeatureList(parent_frame, self.character.features)
         self.feature_tree.grid(row=7, column=0, sticky="nsew", columnspan=2)
         parent_frame.rowconfigure(7, weight=1)
         
@@ -263,12 +494,37 @@ class CharacterCreator(tk.Tk):
         ttk.Button(parent_frame, text="Remove Selected Feature", command=self.remove_feature).grid(row=8, column=0, columnspan=2, pady=10)
         
         # Bind double-click event
-        self.feature_tree.bind("<Double-1>", self.show_feature_description)
+        self.feature_tree.tree.bind("<Double-1>", self.show_feature_description)
+
+    def on_feature_search_key(self, event):
+        # Keys that navigate or choose shouldn't restart the search
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        if self.feature_search_job:
+            self.after_cancel(self.feature_search_job)
+        self.feature_search_job = self.after(SEARCH_DEBOUNCE_MS, self.refresh_feature_matches)
+
+    def refresh_feature_matches(self):
+        self.feature_search_job = None
+        matches = self.feature_search.search(self.feature_combobox.get(), limit=SEARCH_RESULT_LIMIT)
+        self.feature_combobox.config(values=matches)
+
+    def choose_top_feature_match(self, event=None):
+        """Enter in the search box picks the exact match, or failing that the best one."""
+        query = self.feature_combobox.get()
+        name = self.feature_search.resolve(query)
+        if name is None:
+            matches = self.feature_search.search(query, limit=1)
+            name = matches[0] if matches else None
+        if name:
+            self.feature_combobox.set(name)
+            self.populate_feature_fields()
 
     def populate_feature_fields(self, event=None):
-        selected_feature_name = self.feature_combobox.get()
-        feature_data = self.PREDEFINED_FEATURES.get(selected_feature_name)
-        if not feature_data: return
+        selected_feature_name = self.feature_search.resolve(self.feature_combobox.get())
+        if not selected_feature_name: return
+        self.feature_combobox.set(selected_feature_name)
+        feature_data = self.compendium[selected_feature_name]
 
         # Handle stat increase options
         stat_increase = feature_data['stat_increase']
@@ -287,41 +543,35 @@ class CharacterCreator(tk.Tk):
 
     def _add_feature_logic(self, name, stat, desc):
         """Shared logic for adding any feature. Returns True on success, False on failure."""
-        # Prevent adding duplicate features (case-insensitive)
-        existing_names = [f['Name'].lower() for f in self.features]
-        if name.lower() in existing_names:
-            messagebox.showwarning("Duplicate Feature", f"The feature '{name}' has already been added.")
+        granted_before = set(self.character.extra_derived)
+        try:
+            feature = self.character.add_feature(name, stat, desc, self.compendium)
+        except DuplicateFeatureError as e:
+            messagebox.showwarning("Duplicate Feature", str(e))
+            return False
+        except RuleError as e:
+            messagebox.showwarning("Input Error", str(e))
             return False
 
-        feature_to_add = {"Name": name, "Stat": stat, "Description": desc}
-        self.features.append(feature_to_add)
-
-        if stat in self.base_stats:
-            self.base_stats[stat] += 1
-            
-        # Handle special rules for predefined features
-        if name in self.PREDEFINED_FEATURES:
-            feature_data = self.PREDEFINED_FEATURES[name]
-            if 'special' in feature_data:
-                special = feature_data['special']
-                if special.get('derived_stat') == 'Mana' and not hasattr(self, 'mana_max_var'):
-                    self.add_mana_bar()
-                if special.get('language'):
-                    self.add_language_programmatically(special['language'])
-        
-        self.update_displayed_stats()
-        bonus_text = f"+1 {stat}" if stat != "None" else "N/A"
-        self.feature_tree.insert("", "end", values=(name, bonus_text))
+        # Reflect any special rules the feature switched on
+        for language in self.character.granted_languages:
+            self.add_language_programmatically(language)
+
+        # Only the raised stat and any newly granted derived stat (e.g. Mana) need recomputing
+        self.refresh.mark("stats", stat, *(set(self.character.extra_derived) ^ granted_before))
+        self.feature_tree.insert(feature)
+        if self.journal:
+            self.journal.feature_added(self.character, feature)
         return True
 
     def add_predefined_feature(self):
-        name = self.feature_combobox.get()
+        name = self.feature_search.resolve(self.feature_combobox.get())
         stat = self.predefined_stat_var.get()
         if not name or not stat:
             messagebox.showwarning("Input Error", "Please select a feature and a stat.")
             return
 
-        desc = self.PREDEFINED_FEATURES[name]['description']
+        desc = self.compendium[name]['description']
         self._add_feature_logic(name, stat, desc)
         
     def add_custom_feature(self):
@@ -347,44 +597,24 @@ class CharacterCreator(tk.Tk):
             messagebox.showinfo("Information", "Please select a feature to remove.")
             return
 
-        selected_item = self.feature_tree.item(selection[0])
-        feature_name = selected_item['values'][0]
-
-        # Find the feature in the master list
-        feature_to_remove = next((f for f in self.features if f['Name'] == feature_name), None)
-
-        if feature_to_remove:
-            # Revert stat increase
-            stat = feature_to_remove['Stat']
-            if stat in self.base_stats:
-                self.base_stats[stat] -= 1
-
-            # Handle special rule reversals
-            if feature_name == "Scholar":
-                # Remove mana bar if it exists
-                if hasattr(self, 'mana_progress_bar'):
-                    self.mana_progress_bar.master.destroy()
-                    del self.mana_max_var
-                    del self.mana_current
-                    del self.mana_progress_bar
-            
-            # Remove from master list BEFORE updating stats, so special languages get removed
-            self.features.remove(feature_to_remove)
-            
-            # Remove from treeview
-            self.feature_tree.delete(selection[0])
-            
-            # Update all displays
-            self.update_displayed_stats()
+        # The list's selection is a feature id, so no lookup by display name is needed.
+        # The engine reverts the stat increase and any special rules.
+        granted_before = set(self.character.extra_derived)
+        feature = self.character.remove_feature(selection[0], self.compendium)
+        if feature:
+            # Remove from the feature list
+            self.feature_tree.delete(feature)
+
+            # Update what depends on the lowered stat; bars no feature grants any more are removed
+            self.refresh.mark("stats", feature["Stat"], *(set(self.character.extra_derived) ^ granted_before))
+            if self.journal:
+                self.journal.feature_removed(self.character, feature)
 
     def show_feature_description(self, event):
         selection = self.feature_tree.selection()
         if not selection: return
 
-        selected_item = self.feature_tree.item(selection[0])
-        feature_name = selected_item['values'][0]
-
-        found_feature = next((f for f in self.features if f['Name'] == feature_name), None)
+        found_feature = self.character.get_feature(selection[0])
 
         if found_feature:
             title = f"Feature: {found_feature['Name']}"
@@ -392,10 +622,231 @@ class CharacterCreator(tk.Tk):
             message = f"Stat Increase: {bonus}\n\nDescription:\n{found_feature['Description']}"
             messagebox.showinfo(title, message)
 
-    def add_mana_bar(self):
-        self.mana_max_var = tk.IntVar(value=self.base_stats["Mind"] * 3)
-        self.mana_current = tk.IntVar(value=self.mana_max_var.get())
-        self.mana_progress_bar = self.add_bar(self.bars_frame, "Mana", self.mana_current, self.mana_max_var, "Mana.Horizontal.TProgressbar")
+    def add_pool_bar(self, name):
+        """Adds a bar for a conditional derived stat such as Scholar's Mana, starting full."""
+        max_var = tk.IntVar(value=self.derived_values[name])
+        current = tk.IntVar(value=self.character.pools.setdefault(name, max_var.get()))
+        progress = self.add_bar(self.bars_frame, name, current, max_var, f"{name}.Horizontal.TProgressbar")
+        self.pool_bars[name] = (current, max_var, progress)
+
+    def remove_pool_bar(self, name):
+        current, max_var, progress = self.pool_bars.pop(name)
+        progress.master.destroy()
+        # If the pool comes back later it starts full again
+        self.character.pools.pop(name, None)
+
+    def collect_character_state(self):
+        """Copies the state that lives only in widgets (name, languages, bar values) into the character."""
+        self.character.name = self.player_name.get()
+        self.character.languages = [entry.get() for entry in self.language_entries if entry.get()]
+        if self.journal:
+            self.journal.details_changed(self.character)
+
+    def bind_character(self, character):
+        """Shows a character on the existing stat-block widgets in a single pass."""
+        self.character = character
+        self.player_name.set(character.name)
+        # Bars show explicit values from here on; a pool only grows back via Reset
+        character.pools = character.current_pools()
+        if self.journal:
+            self.journal.selected(character)
+
+        with self.refresh.batch():
+            languages = list(character.languages)
+            languages.extend(lang for lang in character.granted_languages if lang not in languages)
+            self.create_language_entries(languages)
+            self.feature_tree.set_store(character.features)
+            self.refresh.mark("all")
+
+    # --- Autosave and undo ---
+    def start_autosave(self):
+        """Opens the autosave journal, offering to restore the last session if it left anything."""
+        errors = []
+        try:
+            journal = Journal.recover(self.autosave_path, self.compendium, errors)
+        except OSError as e:
+            messagebox.showwarning("Autosave", f"Autosave is off: {e}")
+            return
+        if not (journal.characters or journal.allocation):
+            journal = Journal(self.autosave_path, self.compendium)
+        elif messagebox.askyesno("Restore Session", "Restore the characters from your last session?"):
+            self.restore_session(journal)
+            if errors:
+                messagebox.showwarning("Restore Session", f"{len(errors)} changes could not be restored.")
+        else:
+            journal = Journal(self.autosave_path, self.compendium)
+        try:
+            journal.start()
+        except OSError as e:
+            messagebox.showwarning("Autosave", f"Autosave is off: {e}")
+            return
+        self.journal = journal
+
+    def restore_session(self, journal):
+        """Shows a recovered session: its roster and current character, or its unfinished point-buy."""
+        characters = list(journal.characters.values())
+        if characters:
+            self.add_to_roster(characters)
+            current = journal.characters.get(journal.current)
+            if current is not None:
+                self.switch_character(current)
+        elif journal.allocation and "stat_alloc" in self.frames:
+            for stat, value in zip(STATS, journal.allocation):
+                while self.allocation.stats[stat] < value and self.allocation.modify(stat, 1):
+                    pass
+            self.refresh.mark("allocation", *STATS)
+
+    def undo(self):
+        self._step_journal(self.journal.undo if self.journal else None)
+
+    def redo(self):
+        self._step_journal(self.journal.redo if self.journal else None)
+
+    def _step_journal(self, step):
+        """Runs an undo or redo and shows the character it changed."""
+        if step is None or "stat_alloc" in self.frames:
+            return
+        self.collect_character_state()
+        try:
+            character = step()
+        except RuleError as e:
+            messagebox.showwarning("Undo", str(e))
+            return
+        if character is None:
+            return
+        if character is self.character:
+            self.bind_character(character)
+        else:
+            self.switch_character(character)
+
+    def on_close(self):
+        if self.journal:
+            if "stat_block" in self.frames and "stat_alloc" not in self.frames:
+                self.collect_character_state()
+            self.journal.close()
+        if self.publisher:
+            self.publisher.close()
+        self.destroy()
+
+    def publish_sheet(self):
+        """Hands the shown character's state to the live-sync publisher, which sends only what changed."""
+        if self.publisher and "stat_block" in self.frames:
+            from live_sync import sheet_state
+            self.publisher.update(sheet_state(self.character, self.player_name.get()))
+
+    def save_to_file(self):
+        if "stat_alloc" in self.frames:
+            messagebox.showwarning("Save Character", "Please confirm your stats before saving.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".jsonl", filetypes=SAVE_FILETYPES)
+        if not path:
+            return
+        self.collect_character_state()
+        try:
+            save_character(path, self.character, self.compendium)
+        except OSError as e:
+            messagebox.showerror("Save Character", str(e))
+
+    def load_from_file(self):
+        path = filedialog.askopenfilename(filetypes=SAVE_FILETYPES)
+        if not path:
+            return
+        try:
+            character = load_character(path, self.compendium)
+        except (OSError, RuleError) as e:
+            messagebox.showerror("Load Character", str(e))
+            return
+        self.add_to_roster([character])
+
+    def add_to_roster(self, characters):
+        """Appends loaded characters to the roster and shows the first of them."""
+        if not characters:
+            return
+        if "stat_block" in self.frames:
+            self.collect_character_state()
+        self.roster.extend(characters)
+        if self.journal:
+            for character in characters:
+                self.journal.track(character)
+        if "stat_alloc" in self.frames:
+            # Loading skips stat allocation; the screen is built (or shown) straight from the character
+            self.frames.pop("stat_alloc").destroy()
+            self.character = characters[0]
+            if "stat_block" in self.frames:
+                self.return_to_stat_block()
+            else:
+                self.show_stat_block_screen()
+        else:
+            self.bind_character(characters[0])
+            self.refresh_roster_list()
+
+    def import_roster(self):
+        path = filedialog.askopenfilename(filetypes=SAVE_FILETYPES)
+        if not path:
+            return
+        errors = []
+        try:
+            characters = list(iter_roster(path, self.compendium, errors))
+        except (OSError, ValueError) as e:
+            # ValueError: the file is not UTF-8 text at all
+            messagebox.showerror("Import Roster", str(e))
+            return
+        self.add_to_roster(characters)
+        if errors:
+            details = "\n".join(f"Line {line}: {message}" for line, message in errors[:10])
+            messagebox.showwarning("Import Roster", f"Skipped {len(errors)} invalid characters:\n{details}")
+
+    def save_roster_to_file(self):
+        if not self.roster:
+            messagebox.showwarning("Save Roster", "There are no characters to save yet.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".jsonl", filetypes=SAVE_FILETYPES)
+        if not path:
+            return
+        if "stat_alloc" not in self.frames:
+            self.collect_character_state()
+        try:
+            save_roster(path, self.roster, self.compendium)
+        except OSError as e:
+            messagebox.showerror("Save Roster", str(e))
+
+    def export_sheet(self):
+        if "stat_alloc" in self.frames:
+            messagebox.showwarning("Export Sheet", "Please confirm your stats before exporting.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".html", filetypes=EXPORT_FILETYPES)
+        if not path:
+            return
+        # Imported on first use; most sessions never export
+        from sheet_export import export_character
+        self.collect_character_state()
+        try:
+            export_character(self.character, path)
+        except OSError as e:
+            messagebox.showerror("Export Sheet", str(e))
+
+    def export_roster_sheets(self):
+        """Writes a printable sheet per roster character into a folder, rendered in parallel."""
+        if not self.roster:
+            messagebox.showwarning("Export Roster Sheets", "There are no characters to export yet.")
+            return
+        out_dir = filedialog.askdirectory(title="Export sheets to")
+        if not out_dir:
+            return
+        fmt = "pdf" if messagebox.askyesno("Export Roster Sheets", "Export as PDF? (No: HTML)") else "html"
+        from sheet_export import export_characters
+        if "stat_alloc" not in self.frames:
+            self.collect_character_state()
+        self.config(cursor="watch")
+        self.update_idletasks()
+        try:
+            paths = export_characters(self.roster, self.compendium, out_dir, fmt)
+        except OSError as e:
+            messagebox.showerror("Export Roster Sheets", str(e))
+            return
+        finally:
+            self.config(cursor="")
+        messagebox.showinfo("Export Roster Sheets", f"Exported {len(paths)} sheets to {out_dir}.")
     
     def add_override_language(self):
         lang = self.override_lang_entry.get().strip()
@@ -419,60 +870,181 @@ class CharacterCreator(tk.Tk):
         entry.pack(fill="x", pady=3)
         self.language_entries.append(entry)
 
-    def create_language_entries(self):
-        user_langs = [entry.get() for entry in self.language_entries if entry.get()]
-        for widget in self.language_entries_frame.winfo_children():
-            widget.destroy()
-        self.language_entries.clear()
-
-        mind = self.base_stats["Mind"]
-        num_languages = 1 + (mind - 1) // 3
-        self.language_label.config(text=f"\nLanguages (up to {num_languages}):")
-
-        # Re-add all collected languages
-        all_langs = []
-        # Add the base number of empty slots first
-        for i in range(num_languages):
-            all_langs.append(user_langs[i] if i < len(user_langs) else "")
-
-        # Add any extra/override languages
-        if len(user_langs) > num_languages:
-            all_langs.extend(user_langs[num_languages:])
-        
-        for lang_text in all_langs:
-             entry = ttk.Entry(self.language_entries_frame, font=("Segoe UI", 10))
-             entry.insert(0, lang_text)
-             # Check if it was a special read-only language
-             if lang_text in [f['special']['language'] for f in self.PREDEFINED_FEATURES.values() if 'special' in f and 'language' in f['special']]:
-                 entry.config(state="readonly")
-             entry.pack(fill="x", pady=3)
-             self.language_entries.append(entry)
-
-
-    def update_displayed_stats(self):
-        for stat, label_widget in self.stat_display_labels.items():
-            label_widget.config(text=str(self.base_stats[stat]))
-
-        self.health_max_var.set(self.base_stats["Might"] * 3)
-        self.stamina_max_var.set(self.base_stats["Agility"])
-        self.grit_max_var.set(self.base_stats["Will"] * 2)
-
-        if self.health_progress_bar:
-            self.health_progress_bar.config(maximum=self.health_max_var.get())
-            self.health_current.set(min(self.health_current.get(), self.health_max_var.get()))
-        if self.stamina_progress_bar:
-            self.stamina_progress_bar.config(maximum=self.stamina_max_var.get())
-            self.stamina_current.set(min(self.stamina_current.get(), self.stamina_max_var.get()))
-        if self.grit_progress_bar:
-            self.grit_progress_bar.config(maximum=self.grit_max_var.get())
-            self.grit_current.set(min(self.grit_current.get(), self.grit_max_var.get()))
-        if hasattr(self, 'mana_progress_bar') and self.mana_progress_bar:
-            self.mana_max_var.set(self.base_stats["Mind"] * 3)
-            self.mana_progress_bar.config(maximum=self.mana_max_var.get())
-            self.mana_current.set(min(self.mana_current.get(), self.mana_max_var.get()))
-
-        self.create_language_entries()
+    def open_compendium_file(self):
+        path = filedialog.askopenfilename(filetypes=COMPENDIUM_FILETYPES)
+        if not path:
+            return
+        try:
+            close_compendium(open_compendium(path))   # fail here, on a bad file, rather than on next use
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Open Compendium", str(e))
+            return
+        self.load_compendium(path)
+
+    def load_compendium(self, path):
+        """Switches to another compendium file, e.g. a house compendium.
+
+        The old compendium is closed and its homebrew derived stats withdrawn; the
+        new one is opened lazily by the compendium property, unless the stat
+        block is showing and needs it right away.
+        """
+        if "stat_block" in self.frames:
+            self.collect_character_state()
+        if self._compendium is not None:
+            close_compendium(self._compendium)
+        self.compendium_path = path
+        self._compendium = None
+        self._feature_search = None
+        if "stat_block" in self.frames:
+            self.refresh_feature_matches()
+            self.refresh.mark("all")
+
+    def refresh_special_languages(self):
+        """Recomputes the read-only language set. Call whenever the compendium changes."""
+        self.special_languages = {
+            f['special']['language'] for f in self.compendium.values()
+            if 'special' in f and 'language' in f['special']
+        }
+
+    def _set_language_slot(self, entry, lang_text):
+        """Updates an existing language entry in place, touching Tk only if something changed."""
+        state = "readonly" if lang_text in self.special_languages else "normal"
+        if entry.get() != lang_text:
+            entry.config(state="normal")
+            entry.delete(0, tk.END)
+            entry.insert(0, lang_text)
+            entry.config(state=state)
+        elif str(entry.cget("state")) != state:
+            entry.config(state=state)
+
+    def create_language_entries(self, user_langs=None):
+        """Reconciles the language panel with the current slot count.
+
+        Filled-in languages (taken from the entries unless `user_langs` is given)
+        are packed to the front, followed by empty slots up to the Mind allowance,
+        then any extra/override languages. Existing entries are reused; only the
+        slots that differ are created, updated or destroyed.
+        """
+        if user_langs is None:
+            user_langs = [text for text in (entry.get() for entry in self.language_entries) if text]
+
+        num_languages = self.character.language_slots
+        if num_languages != self.shown_language_slots:
+            self.language_label.config(text=f"\nLanguages (up to {num_languages}):")
+            self.shown_language_slots = num_languages
+
+        # Add the base number of slots first, then any extra/override languages
+        all_langs = [user_langs[i] if i < len(user_langs) else "" for i in range(num_languages)]
+        all_langs.extend(user_langs[num_languages:])
+
+        for entry, lang_text in zip(self.language_entries, all_langs):
+            self._set_language_slot(entry, lang_text)
+
+        # Drop surplus slots, or create the missing ones
+        for entry in self.language_entries[len(all_langs):]:
+            entry.destroy()
+        del self.language_entries[len(all_langs):]
+        for lang_text in all_langs[len(self.language_entries):]:
+            entry = ttk.Entry(self.language_entries_frame, font=("Segoe UI", 10))
+            entry.insert(0, lang_text)
+            if lang_text in self.special_languages:
+                entry.config(state="readonly")
+            entry.pack(fill="x", pady=3)
+            self.language_entries.append(entry)
+
+
+    def update_displayed_stats(self, changed=None):
+        """Pushes stat changes to the screen.
+
+        `changed` names the base stats that moved and any derived stats a feature
+        granted or revoked; only the labels, bars and language slots that depend
+        on them are touched. Without it everything is recomputed (e.g. after
+        binding another character).
+        """
+        stats = self.character.stats
+        extra_derived = self.character.extra_derived
+        if changed is None:
+            shown_stats = STATS
+            self.derived_values = DERIVED_GRAPH.evaluate(stats, extra_derived)
+            dirty = [name for name in DERIVED_GRAPH.nodes if name in self.derived_values or name in self.pool_bars]
+            # Bars for stats no longer in the graph, e.g. a closed compendium's homebrew pools
+            dirty += [name for name in self.pool_bars if name not in DERIVED_GRAPH.nodes]
+        else:
+            shown_stats = [stat for stat in STATS if stat in changed]
+            dirty = DERIVED_GRAPH.recompute(stats, extra_derived, self.derived_values, changed)
+
+        for stat in shown_stats:
+            self.stat_display_labels[stat].config(text=str(stats[stat]))
+
+        for name in dirty:
+            if name == "Languages":
+                self.create_language_entries()
+            elif name not in self.derived_values:
+                if name in self.pool_bars:
+                    self.remove_pool_bar(name)
+            elif not DERIVED_GRAPH.nodes[name].pool:
+                continue
+            elif name not in self.pool_bars:
+                self.add_pool_bar(name)
+            else:
+                current, max_var, progress = self.pool_bars[name]
+                maximum = self.derived_values[name]
+                max_var.set(maximum)
+                progress.config(maximum=maximum)
+                value = min(self.character.pools.get(name, maximum), maximum)
+                self.character.pools[name] = value
+                current.set(value)
+
+    def flush_refresh(self, dirty):
+        """Applies everything marked dirty since the last flush in one pass."""
+        if "allocation" in dirty and "stat_alloc" in self.frames:
+            for stat in dirty["allocation"]:
+                self.stat_vars[stat].set(self.allocation.stats[stat])
+            self.point_label.config(text=f"Points Left: {self.allocation.points_left}")
+
+        if "stat_block" not in self.frames:
+            return
+        if "all" in dirty:
+            self.update_displayed_stats()
+            pools = list(self.pool_bars)
+        else:
+            if "stats" in dirty:
+                self.update_displayed_stats(dirty["stats"])
+            pools = dirty.get("pools", ())
+        for name in pools:
+            if name in self.pool_bars:
+                current, max_var, progress = self.pool_bars[name]
+                current.set(self.character.pools.get(name, self.derived_values[name]))
+        self.publish_sheet()
 
 if __name__ == "__main__":
-    app = CharacterCreator()
-    app.mainloop()
\ No newline at end of file
+    # Roster export renders in worker processes, which a frozen build must be able to start
+    import multiprocessing
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(description="Flutter Character Creator")
+    parser.add_argument("compendium", nargs="?", help="A house compendium to use instead of the bundled one")
+    parser.add_argument("--startup-timer", action="store_true", help="Report the time from launch to the first window")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="Time UI handlers and write a report on exit (.json, or .folded for flame graphs)")
+    parser.add_argument("--autosave", metavar="PATH", default=AUTOSAVE_FILE, help="Autosave journal file")
+    parser.add_argument("--no-autosave", action="store_true", help="Don't journal changes or offer to restore")
+    parser.add_argument("--sync", metavar="HOST[:PORT]", help="Publish the shown character to a GM's session server")
+    args = parser.parse_args()
+
+    profiler = None
+    if args.profile:
+        profiler = Profiler()
+        profiler.start()
+    sync_connect = None
+    if args.sync:
+        from live_sync import parse_address, tcp_connector
+        sync_connect = tcp_connector(*parse_address(args.sync))
+    app = CharacterCreator(args.compendium, startup_timer=args.startup_timer, profiler=profiler,
+                           autosave_path=None if args.no_autosave else args.autosave,
+                           sync_connect=sync_connect)
+    app.mainloop()
+    if profiler:
+        profiler.stop()
+        profiler.save(args.profile)
+        if sys.stdout is not None:
+            print(profiler.summary())
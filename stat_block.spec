@@ -5,7 +5,7 @@ a = Analysis(
     ['stat_block.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('features.cmp', '.'), ('icon.ico', '.'), ('icons/*.png', 'icons')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
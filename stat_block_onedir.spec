@@ -0,0 +1,50 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Startup-optimized build: a folder instead of a single exe.
+# The one-file build unpacks and decompresses its whole archive to a temp dir
+# on every launch; this one starts straight from dist/stat_block/. UPX is off
+# too, since decompressing the binaries also costs time at each launch.
+#     pyinstaller stat_block_onedir.spec
+
+
+a = Analysis(
+    ['stat_block.py'],
+    pathex=[],
+    binaries=[],
+    datas=[('features.cmp', '.'), ('icon.ico', '.'), ('icons/*.png', 'icons')],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=[],
+    noarchive=False,
+    optimize=0,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='stat_block',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=['icon.ico'],
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='stat_block',
+)
@@ -0,0 +1,15 @@
+from character_engine import STATS, build_characters
+
+STATS_ROW = dict(zip(STATS, (3, 3, 3, 3)))
+
+
+def test_malformed_rows_do_not_stop_the_batch():
+    rows = [{"stats": STATS_ROW, "features": [{"name": 5, "stat": "Might"}]},
+            {"stats": STATS_ROW, "features": [{"name": "Lucky", "stat": ["Might"], "description": ""}]},
+            {"stats": STATS_ROW, "features": [{"name": "Lucky", "stat": "Might", "description": 7}]},
+            {"stats": STATS_ROW, "features": [5]},
+            {"stats": dict(STATS_ROW, Might=True)},
+            {"stats": STATS_ROW, "name": "Ash", "features": [{"name": "Lucky", "stat": "Might", "description": ""}]}]
+    characters, errors = build_characters(rows)
+    assert [character.name for character in characters] == ["Ash"]
+    assert [index for index, _ in errors] == [0, 1, 2, 3, 4]
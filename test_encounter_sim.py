@@ -0,0 +1,57 @@
+from character_engine import STATS, Character, open_compendium
+from compendium import default_compendium_path
+from encounter_sim import simulate
+
+COMPENDIUM = open_compendium(default_compendium_path())
+
+
+def party(size, feature):
+    """`size` identical characters, each with `feature` (or a custom feature with no rules)."""
+    members = []
+    for _ in range(size):
+        character = Character(dict(zip(STATS, (3, 3, 3, 3))))
+        description = COMPENDIUM[feature]["description"] if feature in COMPENDIUM else ""
+        character.add_feature(feature, "Agility", description, COMPENDIUM)
+        members.append(character)
+    return members
+
+
+def brute():
+    return [Character(dict(zip(STATS, (6, 2, 1, 3))))]
+
+
+def test_knaves_flank_a_lone_enemy():
+    knaves = simulate(party(2, "Knave"), brute(), encounters=4000, seed=1)
+    plain = simulate(party(2, "Plain"), brute(), encounters=4000, seed=1)
+    assert knaves.win_rates[0] > plain.win_rates[0]
+    assert knaves.rounds_total < plain.rounds_total
+
+
+def test_exhaustion_is_a_fraction_of_each_side():
+    # Stamina is Agility, so with no regen these three run dry in different rounds
+    side = [Character(dict(zip(STATS, stats))) for stats in ((5, 2, 2, 3), (3, 4, 2, 3), (2, 6, 1, 3))]
+    report = simulate(side, brute(), encounters=1, seed=0, rules={"stamina_regen": 0})
+    exhausted = report.exhaustion_curves[:, 0]
+    assert ((exhausted > 0) & (exhausted < 1)).any()
+
+
+def test_rounds_stop_when_a_fight_ends():
+    sure_hits = {"hit_chance": 1.0, "agility_hit_bonus": 0}
+    weak = [Character(dict(zip(STATS, (1, 6, 1, 4))))]
+    # 6 damage a round against 3 Health: over in the first round
+    quick = simulate(brute(), weak, encounters=50, seed=0, rules=sure_hits)
+    assert quick.rounds_total == 50
+    assert quick.win_rates[0] == 1
+    # Evenly matched: 3 damage a round against 9 Health, both fall in round 3
+    even = [Character(dict(zip(STATS, (3, 3, 3, 3))))]
+    slow = simulate(even, [Character(dict(zip(STATS, (3, 3, 3, 3))))], encounters=50, seed=0, rules=sure_hits)
+    assert slow.rounds_total == 150
+    assert slow.win_rates[2] == 1
+
+
+def test_finished_fights_keep_their_final_state():
+    # Misses drag some fights out; one won in round 1 leaves the brute with half its Stamina for good
+    weak = [Character(dict(zip(STATS, (1, 6, 1, 4))))]
+    report = simulate(brute(), weak, encounters=200, seed=0,
+                      rules={"hit_chance": 0.5, "agility_hit_bonus": 0, "stamina_regen": 0})
+    assert report.resource_curves[-1, 0, 1] > 0
@@ -0,0 +1,48 @@
+"""
+Coalesced UI refreshes.
+
+Handlers mark parts of the UI dirty instead of redrawing them straight away.
+The scheduler flushes everything that was marked once, on the next idle cycle
+(`after_idle`), so a burst of clicks or a multi-step change costs one redraw.
+Inside `with scheduler.batch():` nothing is flushed until the outermost batch
+exits, which then flushes synchronously - use it for bulk edits such as loading
+a build or undoing many steps.
+"""
+from contextlib import contextmanager
+
+
+class RefreshScheduler:
+    """Accumulates dirty {kind: set of names} and hands them to `flush_callback` once."""
+
+    def __init__(self, widget, flush_callback):
+        self.widget = widget
+        self.flush_callback = flush_callback
+        self.dirty = {}
+        self.pending = None
+        self.batch_depth = 0
+
+    def mark(self, kind, *names):
+        """Marks names of one kind (e.g. "stats", "pools") dirty and schedules a flush."""
+        self.dirty.setdefault(kind, set()).update(names)
+        if self.pending is None and self.batch_depth == 0:
+            self.pending = self.widget.after_idle(self.flush)
+
+    @contextmanager
+    def batch(self):
+        self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                self.flush()
+
+    def flush(self):
+        """Runs the pending refresh now (no-op if nothing is dirty)."""
+        if self.pending is not None:
+            self.widget.after_cancel(self.pending)
+            self.pending = None
+        if not self.dirty:
+            return
+        dirty, self.dirty = self.dirty, {}
+        self.flush_callback(dirty)
@@ -0,0 +1,202 @@
+"""
+Virtualized feature list for very large feature sets.
+
+VirtualFeatureList looks like the old feature Treeview, but only the rows that
+fit on screen exist as Tk items. Filtering and sorting happen on a list of
+feature ids in Python (the model), and scrolling just re-renders the visible
+window, so insert, redraw and scroll cost stay constant as the list grows to
+tens of thousands of features.
+"""
+from tkinter import ttk
+from bisect import bisect_left, insort
+
+DEFAULT_ROW_HEIGHT = 20
+
+COLUMNS = {
+    "Feature": {"text": "Feature Name", "width": 250, "anchor": "w", "key": lambda f: f["Name"].casefold()},
+    "Bonus": {"text": "Stat Bonus", "width": 100, "anchor": "center", "key": lambda f: f["Stat"]},
+}
+
+
+class Descending:
+    """Wraps a sort key so that it orders the other way round, for bisecting a descending list."""
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+
+def bonus_text(feature):
+    return f"+1 {feature['Stat']}" if feature["Stat"] != "None" else "N/A"
+
+
+class VirtualFeatureList(ttk.Frame):
+    """A scrollable, sortable, filterable view over a FeatureStore.
+
+    Treeview item ids are feature ids, and selection() returns feature ids
+    (as ints) even when the selected row has been scrolled out of view.
+    """
+
+    def __init__(self, parent, store, **kwargs):
+        super().__init__(parent, style="TFrame", **kwargs)
+        self.store = store
+        self.order = []          # Feature ids that pass the filter, in display order
+        self.first = 0           # Index into self.order of the top visible row
+        self.visible_rows = 10
+        self.selected = None
+        self.filter_text = ""
+        self.sort_column = None
+        self.sort_reverse = False
+        self.render_job = None
+
+        style = ttk.Style(self)
+        self.row_height = int(style.lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT)
+
+        self.tree = ttk.Treeview(self, columns=tuple(COLUMNS), show="headings", selectmode="browse", height=self.visible_rows)
+        for column, spec in COLUMNS.items():
+            self.tree.heading(column, text=spec["text"], command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=spec["width"], anchor=spec["anchor"])
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(1, "units"))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-1, "pages"))
+        self.tree.bind("<Next>", lambda e: self.scroll(1, "pages"))
+        self.bind("<Configure>", self._on_resize)
+
+        self.refresh()
+
+    # --- Model ---
+    def _matches(self, feature):
+        return not self.filter_text or self.filter_text in feature["Name"].casefold()
+
+    def _position_key(self, feature):
+        """Where a feature sits in self.order. Ties keep insertion order, i.e. ascending id."""
+        if not self.sort_column:
+            return feature["Id"]
+        key = COLUMNS[self.sort_column]["key"](feature)
+        return (Descending(key) if self.sort_reverse else key), feature["Id"]
+
+    def _sort_key(self, feature_id):
+        return self._position_key(self.store.get(feature_id))
+
+    def refresh(self):
+        """Rebuilds the filtered, sorted id list from the store and redraws."""
+        features = [f for f in self.store if self._matches(f)]
+        if self.sort_column:
+            features.sort(key=COLUMNS[self.sort_column]["key"], reverse=self.sort_reverse)
+        self.order = [f["Id"] for f in features]
+        self.render()
+
+    def set_store(self, store):
+        self.store = store
+        self.selected = None
+        self.first = 0
+        self.refresh()
+
+    def set_filter(self, text):
+        self.filter_text = text.strip().casefold()
+        self.first = 0
+        self.refresh()
+
+    def sort_by(self, column):
+        """Heading click: sort ascending, then descending, then back to insertion order."""
+        if self.sort_column != column:
+            self.sort_column, self.sort_reverse = column, False
+        elif not self.sort_reverse:
+            self.sort_reverse = True
+        else:
+            self.sort_column, self.sort_reverse = None, False
+        for name, spec in COLUMNS.items():
+            arrow = ""
+            if name == self.sort_column:
+                arrow = " ▼" if self.sort_reverse else " ▲"
+            self.tree.heading(name, text=spec["text"] + arrow)
+        self.refresh()
+
+    def insert(self, feature):
+        """Adds one feature to the view without re-reading the whole store."""
+        if not self._matches(feature):
+            return
+        insort(self.order, feature["Id"], key=self._sort_key)
+        self.request_render()
+
+    def delete(self, feature):
+        """Removes one feature from the view. `feature` may already be gone from the store."""
+        feature_id = feature["Id"]
+        target = self._position_key(feature)
+        # The store has usually dropped the feature already, so its own key comes from `feature`
+        index = bisect_left(self.order, target,
+                            key=lambda other: target if other == feature_id else self._sort_key(other))
+        if index < len(self.order) and self.order[index] == feature_id:
+            del self.order[index]
+        if self.selected == feature_id:
+            self.selected = None
+        self.request_render()
+
+    def selection(self):
+        return (self.selected,) if self.selected is not None else ()
+
+    # --- View ---
+    def request_render(self):
+        """Redraws on the next idle cycle, so a burst of inserts and deletes costs one redraw."""
+        if self.render_job is None:
+            self.render_job = self.after_idle(self.render)
+
+    def render(self):
+        """Materializes only the rows in the visible window."""
+        if self.render_job is not None:
+            self.after_cancel(self.render_job)
+            self.render_job = None
+        self.first = max(0, min(self.first, len(self.order) - self.visible_rows))
+        window = self.order[self.first:self.first + self.visible_rows]
+        self.tree.delete(*self.tree.get_children())
+        for feature_id in window:
+            feature = self.store.get(feature_id)
+            self.tree.insert("", "end", iid=str(feature_id), values=(feature["Name"], bonus_text(feature)))
+        if self.selected in window:
+            self.tree.selection_set(str(self.selected))
+
+        total = len(self.order)
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.visible_rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def yview(self, *args):
+        """Scrollbar callback ("moveto", fraction) or ("scroll", n, units|pages)."""
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.order))
+            self.render()
+        elif args[0] == "scroll":
+            self.scroll(int(args[1]), args[2])
+
+    def scroll(self, amount, what):
+        step = self.visible_rows if what == "pages" else 1
+        self.first += amount * step
+        self.render()
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if selection:
+            self.selected = int(selection[0])
+
+    def _on_resize(self, event):
+        # One row's worth of height goes to the headings
+        rows = max(1, event.height // self.row_height - 1)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.tree.config(height=rows)
+            self.render()